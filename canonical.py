@@ -0,0 +1,179 @@
+# canonical.py
+"""Canonical phone numbers, states and cities for normalized rows.
+
+Customers type the same thing many ways: "0803 123 4567", "+234 803...",
+"lagos", "Lagos State", "LA", "FCT", "port-harcourt". canonicalize_row
+rewrites a row's PhoneNumber, State and City in place:
+
+- Nigerian mobile numbers become E.164 ("+2348031234567"). Anything that
+  is not a recognisable number (two numbers in one field, landlines,
+  junk) is kept as typed.
+- States and cities are looked up in a gazetteer keyed on the name with
+  case, spacing and punctuation removed (and a trailing "State"), which
+  also covers WooCommerce state codes. On a miss, difflib picks the
+  closest name above LOCATION_FUZZY_CUTOFF. Unknown names are kept as
+  typed, with spaces tidied.
+
+Every lookup is memoized, because repeat customers and a few busy
+locations make up most rows.
+"""
+import difflib
+import re
+from functools import lru_cache
+from typing import Any, Dict, List
+from config import HEADERS, PHONE_COUNTRY_CODE, LOCATION_FUZZY_CUTOFF
+
+NATIONAL_DIGITS = 10         # Nigerian numbers after the country code / trunk 0
+MOBILE_PREFIXES = "789"      # 070x, 080x, 081x, 090x, 091x...
+
+# canonical name → other spellings (WooCommerce state codes included)
+STATES = {
+    "Abia": ["AB"], "Adamawa": ["AD"], "Akwa Ibom": ["AK"], "Anambra": ["AN"],
+    "Bauchi": ["BA"], "Bayelsa": ["BY"], "Benue": ["BE"], "Borno": ["BO"],
+    "Cross River": ["CR"], "Delta": ["DE"], "Ebonyi": ["EB"], "Edo": ["ED"],
+    "Ekiti": ["EK"], "Enugu": ["EN"], "Gombe": ["GO"], "Imo": ["IM"],
+    "Jigawa": ["JI"], "Kaduna": ["KD"], "Kano": ["KN"], "Katsina": ["KT"],
+    "Kebbi": ["KE"], "Kogi": ["KO"], "Kwara": ["KW"], "Lagos": ["LA", "Lasgidi"],
+    "Nasarawa": ["NA", "Nassarawa"], "Niger": ["NI"], "Ogun": ["OG"], "Ondo": ["ON"],
+    "Osun": ["OS"], "Oyo": ["OY"], "Plateau": ["PL"], "Rivers": ["RI"],
+    "Sokoto": ["SO"], "Taraba": ["TA"], "Yobe": ["YO"], "Zamfara": ["ZA"],
+    "FCT": ["FC", "Abuja", "Federal Capital Territory", "FCT Abuja", "Abuja FCT"],
+}
+
+CITIES = {
+    # Lagos
+    "Ikeja": [], "Lekki": [], "Ajah": [], "Yaba": [], "Surulere": [], "Ikorodu": [],
+    "Victoria Island": ["VI"], "Ikoyi": [], "Lagos Island": [], "Apapa": [],
+    "Festac": ["Festac Town"], "Oshodi": [], "Agege": [], "Alimosho": [], "Egbeda": [],
+    "Ikotun": [], "Ojo": [], "Badagry": [], "Epe": [], "Gbagada": [], "Maryland": [],
+    "Magodo": [], "Ogba": [], "Isolo": [], "Mushin": [], "Ojodu": [], "Berger": [],
+    "Sangotedo": [], "Ketu": [], "Ogudu": [],
+    # FCT
+    "Abuja": [], "Garki": [], "Wuse": [], "Maitama": [], "Asokoro": [], "Gwarinpa": [],
+    "Kubwa": [], "Lugbe": [], "Jabi": [], "Utako": [], "Nyanya": [],
+    # elsewhere
+    "Port Harcourt": ["PH", "PHC"], "Ibadan": [], "Kano": [], "Kaduna": [],
+    "Benin City": ["Benin"], "Enugu": [], "Onitsha": [], "Aba": [], "Owerri": [],
+    "Warri": [], "Calabar": [], "Uyo": [], "Abeokuta": [], "Ilorin": [], "Jos": [],
+    "Akure": [], "Osogbo": ["Oshogbo"], "Ado-Ekiti": [], "Asaba": [], "Awka": [],
+    "Abakaliki": [], "Umuahia": [], "Makurdi": [], "Lokoja": [], "Minna": [],
+    "Sokoto": [], "Maiduguri": [], "Yola": [], "Bauchi": [], "Gombe": [],
+    "Katsina": [], "Zaria": [], "Ota": ["Sango Ota", "Sango-Ota"], "Sagamu": ["Shagamu"],
+    "Ile-Ife": ["Ife"], "Ogbomoso": [], "Nnewi": [], "Yenagoa": [],
+}
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def _key(name: str) -> str:
+    """Lookup key: lower-case letters and digits only, without a trailing "state"."""
+    key = _NON_ALNUM.sub("", name.lower())
+    if key.endswith("state") and len(key) > len("state"):
+        key = key[:-len("state")]
+    return key
+
+
+def _compile(names: Dict[str, List[str]]) -> Dict[str, str]:
+    table: Dict[str, str] = {}
+    for canonical, aliases in names.items():
+        for name in [canonical] + aliases:
+            table.setdefault(_key(name), canonical)
+    return table
+
+
+_STATE_KEYS = _compile(STATES)
+_CITY_KEYS = _compile(CITIES)
+
+
+def _lookup(table: Dict[str, str], text: str) -> str:
+    key = _key(text)
+    if key in table:
+        return table[key]
+    if len(key) >= 4:  # short strings and codes only match exactly
+        close = difflib.get_close_matches(key, table.keys(), n=1, cutoff=LOCATION_FUZZY_CUTOFF)
+        if close:
+            return table[close[0]]
+    return " ".join(text.split())
+
+
+@lru_cache(maxsize=4096)
+def _state(text: str) -> str:
+    return _lookup(_STATE_KEYS, text)
+
+
+@lru_cache(maxsize=4096)
+def _city(text: str) -> str:
+    return _lookup(_CITY_KEYS, text)
+
+
+@lru_cache(maxsize=65536)
+def _phone(text: str) -> str:
+    raw = text.strip()
+    digits = "".join(ch for ch in raw if ch.isdigit())
+    international = raw.startswith("+") or raw.startswith("00")
+    if raw.startswith("00"):
+        digits = digits[2:]
+
+    if digits.startswith(PHONE_COUNTRY_CODE) and len(digits) > NATIONAL_DIGITS:
+        national = digits[len(PHONE_COUNTRY_CODE):]
+        if national.startswith("0"):  # "+234 0803..."
+            national = national[1:]
+    elif international:
+        # another country: keep it, only tidied, if it is a plausible E.164 number
+        return "+" + digits if 8 <= len(digits) <= 15 else raw
+    elif digits.startswith("0"):
+        national = digits[1:]
+    else:
+        national = digits
+
+    if len(national) == NATIONAL_DIGITS and national[0] in MOBILE_PREFIXES:
+        return f"+{PHONE_COUNTRY_CODE}{national}"
+    return raw
+
+
+def canonical_phone(value: Any) -> Any:
+    return _phone(str(value)) if value else value
+
+
+def canonical_state(value: Any) -> Any:
+    return _state(str(value)) if value else value
+
+
+def canonical_city(value: Any) -> Any:
+    return _city(str(value)) if value else value
+
+
+_ROW_FIELDS = tuple(
+    (HEADERS.index(name), fn)
+    for name, fn in (("PhoneNumber", canonical_phone), ("State", canonical_state), ("City", canonical_city))
+    if name in HEADERS
+)
+
+
+def canonicalize_row(row: List[Any]) -> List[Any]:
+    """Canonicalize a HEADERS-ordered row's phone, state and city in place."""
+    for col, fn in _ROW_FIELDS:
+        if col < len(row):
+            row[col] = fn(row[col])
+    return row
+
+
+
+_PHONE_COL = HEADERS.index("PhoneNumber") if "PhoneNumber" in HEADERS else None
+
+
+def phone_as_text(rows: List[List[Any]]) -> List[List[Any]]:
+    """Copies of `rows` for a USER_ENTERED append, with the phone cell forced to text.
+
+    Sheets would parse "+2348031234567" (or "0803 123 4567") as a number and
+    drop the "+" or leading zero; a leading apostrophe keeps the cell as
+    typed and is not stored.
+    """
+    col = _PHONE_COL
+    out = []
+    for row in rows:
+        phone = row[col] if col is not None and col < len(row) else None
+        if phone and not str(phone).startswith("'"):
+            row = row[:col] + ["'" + str(phone)] + row[col + 1:]
+        out.append(row)
+    return out
@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv, find_dotenv
 
@@ -13,6 +14,7 @@ STORES = [
         "url": os.getenv("WOO1_URL"),
         "consumer_key": os.getenv("WOO1_CONSUMER_KEY"),
         "consumer_secret": os.getenv("WOO1_CONSUMER_SECRET"),
+        "webhook_secret": os.getenv("WOO1_WEBHOOK_SECRET"),
         "type": "woo",
     },
     {
@@ -20,12 +22,14 @@ STORES = [
         "url": os.getenv("WOO2_URL"),
         "consumer_key": os.getenv("WOO2_CONSUMER_KEY"),
         "consumer_secret": os.getenv("WOO2_CONSUMER_SECRET"),
+        "webhook_secret": os.getenv("WOO2_WEBHOOK_SECRET"),
         "type": "woo",
     },
     {
         "name": os.getenv("SHOPIFY_NAME"),
         "url": os.getenv("SHOPIFY_URL"),
         "access_token": os.getenv("SHOPIFY_ACCESS_TOKEN"),
+        "webhook_secret": os.getenv("SHOPIFY_WEBHOOK_SECRET"),
         "type": "shopify",
     },
 ]
@@ -35,6 +39,18 @@ STORES = [
 # ==========================
 CREDS_FILE = os.getenv("CREDS_FILE")
 MASTER_SHEET_ID = os.getenv("MASTER_SHEET_ID")
+SHEET_HEADER_TTL_SECONDS = int(os.getenv("SHEET_HEADER_TTL_SECONDS", "3600"))  # cached header rows
+SHEET_METADATA_TTL_SECONDS = int(os.getenv("SHEET_METADATA_TTL_SECONDS", "3600"))  # cached worksheet lists
+
+# Sheets API quota, shared by every process (buckets kept in the state store).
+# At most SHEETS_BURST + the refill land in any 60s window, so the refill is
+# (per minute - burst) / 60 per second and no window goes over the quota.
+SHEETS_READS_PER_MINUTE = int(os.getenv("SHEETS_READS_PER_MINUTE", "60"))
+SHEETS_WRITES_PER_MINUTE = int(os.getenv("SHEETS_WRITES_PER_MINUTE", "60"))
+SHEETS_BURST = int(os.getenv("SHEETS_BURST", "10"))
+SHEETS_MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES", "5"))
+SHEETS_BACKOFF_BASE = float(os.getenv("SHEETS_BACKOFF_BASE", "2"))   # seconds, doubled per attempt
+SHEETS_BACKOFF_MAX = float(os.getenv("SHEETS_BACKOFF_MAX", "64"))
 
 # ==========================
 # Twilio WhatsApp
@@ -84,9 +100,33 @@ HEADERS = [
     "OrderGroupID",
     "order id",
     "source",
-
+    "agent in charge",  # filled in by order_distributor.py
 ]
 
+# ==========================
+# Shopify Checkout Fields (note_attributes)
+# ==========================
+# field → note attribute names that carry it, matched ignoring case and spacing;
+# earlier names win when an order has several. NOTE_ATTRIBUTE_ALIASES (JSON of
+# the same shape) adds names or whole fields without a code change.
+NOTE_ATTRIBUTE_ALIASES = {
+    "full_name": ["Full name", "Name", "Customer name"],
+    "phone": ["Phone", "Phone number"],
+    "address": ["Address", "Delivery address"],
+    "state": ["State"],
+    "city": ["City"],
+    "note": ["Note"],
+}
+for _field, _names in json.loads(os.getenv("NOTE_ATTRIBUTE_ALIASES", "{}")).items():
+    NOTE_ATTRIBUTE_ALIASES.setdefault(_field, []).extend(_names)
+
+# ==========================
+# Canonicalization (canonical.py)
+# ==========================
+CANONICALIZE_ROWS = os.getenv("CANONICALIZE_ROWS", "1") == "1"         # E.164 phones, gazetteer states/cities
+PHONE_COUNTRY_CODE = os.getenv("PHONE_COUNTRY_CODE", "234")             # for numbers typed without one
+LOCATION_FUZZY_CUTOFF = float(os.getenv("LOCATION_FUZZY_CUTOFF", "0.85"))  # difflib ratio for near-miss names
+
 
 
 
@@ -95,6 +135,72 @@ HEADERS = [
 # State directory
 # ==========================
 STATE_DIR = os.path.join(os.path.dirname(__file__), "state")
+STATE_DB = os.getenv("STATE_DB", os.path.join(STATE_DIR, "pipeline_state.sqlite3"))
+ORDER_JOURNAL_PATH = os.getenv("ORDER_JOURNAL_PATH", os.path.join(STATE_DIR, "orders.journal"))
+ORDER_JOURNAL_ENABLED = os.getenv("ORDER_JOURNAL_ENABLED", "1") == "1"
+
+# ==========================
+# Store Fetching
+# ==========================
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "4"))        # stores fetched at once
+STORE_FETCH_DEADLINE_SECONDS = int(os.getenv("STORE_FETCH_DEADLINE_SECONDS", "300"))
+WOO_PAGE_CONCURRENCY = int(os.getenv("WOO_PAGE_CONCURRENCY", "4"))  # pages fetched at once per Woo store
+APPEND_BATCH_ROWS = int(os.getenv("APPEND_BATCH_ROWS", "500"))      # rows per append_rows in streaming mode
+
+# Store API requests: per-host token bucket + retries
+STORE_REQUEST_TIMEOUT = int(os.getenv("STORE_REQUEST_TIMEOUT", "60"))
+STORE_MAX_RETRIES = int(os.getenv("STORE_MAX_RETRIES", "3"))
+STORE_BACKOFF_BASE = float(os.getenv("STORE_BACKOFF_BASE", "1"))     # seconds, doubled per attempt
+STORE_BACKOFF_MAX = float(os.getenv("STORE_BACKOFF_MAX", "30"))
+WOO_REQUESTS_PER_SECOND = float(os.getenv("WOO_REQUESTS_PER_SECOND", "5"))
+WOO_BURST = int(os.getenv("WOO_BURST", "10"))
+SHOPIFY_REQUESTS_PER_SECOND = float(os.getenv("SHOPIFY_REQUESTS_PER_SECOND", "2"))  # REST leak rate
+SHOPIFY_BURST = int(os.getenv("SHOPIFY_BURST", "40"))                              # REST bucket size
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", str(max(10, WOO_PAGE_CONCURRENCY))))  # keep-alive conns per host
+
+# Ask stores for only the order fields normalizer.py reads (fields= / _fields=).
+# While the order journal is on, JOURNAL_EXTRA_FIELDS are requested too, so a
+# replay can fill new columns from them; a projected journal holds nothing
+# else. WooCommerce and Shopify names share the list (a name a platform lacks
+# is simply absent). STORE_FIELD_PROJECTION=0 fetches and journals whole orders.
+STORE_FIELD_PROJECTION = os.getenv("STORE_FIELD_PROJECTION", "1") == "1"
+JOURNAL_EXTRA_FIELDS = [f.strip() for f in os.getenv(
+    "JOURNAL_EXTRA_FIELDS",
+    "status,date_created,created_at,email,customer_note,note,tags,currency,"
+    "total,total_price,total_tax,discount_total,total_discounts,shipping_total,"
+    "shipping_lines,payment_method_title,financial_status",
+).split(",") if f.strip()]
+
+# Per-store circuit breaker (state kept in the state store)
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "3"))  # failures before opening
+BREAKER_COOLDOWN_SECONDS = int(os.getenv("BREAKER_COOLDOWN_SECONDS", "900"))  # open → half-open probe
+BREAKER_PROBE_DEADLINE_SECONDS = int(os.getenv("BREAKER_PROBE_DEADLINE_SECONDS", "30"))
+HEALTH_HISTORY_SIZE = int(os.getenv("HEALTH_HISTORY_SIZE", "20"))             # runs kept per store
+
+# ==========================
+# Webhook Receiver
+# ==========================
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "127.0.0.1")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8085"))
+WEBHOOK_FLUSH_ROWS = int(os.getenv("WEBHOOK_FLUSH_ROWS", "50"))          # append once this many rows wait
+WEBHOOK_FLUSH_SECONDS = float(os.getenv("WEBHOOK_FLUSH_SECONDS", "5"))   # ...or the oldest waited this long
+
+# ==========================
+# Daemon (adaptive polling)
+# ==========================
+POLL_MIN_SECONDS = float(os.getenv("POLL_MIN_SECONDS", "10"))            # busiest a store gets polled
+POLL_MAX_SECONDS = float(os.getenv("POLL_MAX_SECONDS", "300"))           # quietest a store gets polled
+POLL_TARGET_ORDERS = float(os.getenv("POLL_TARGET_ORDERS", "1"))         # aim for about this many orders per poll
+POLL_RATE_WINDOW_SECONDS = float(os.getenv("POLL_RATE_WINDOW_SECONDS", "600"))  # arrival-rate memory
+DAEMON_DELIVER_SECONDS = float(os.getenv("DAEMON_DELIVER_SECONDS", "60"))  # distribute/send sweep when idle
+
+# ==========================
+# Concurrent Pipeline (run_all.py --pipeline)
+# ==========================
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "8"))         # pages/batches waiting between stages
+PIPELINE_FETCH_WORKERS = int(os.getenv("PIPELINE_FETCH_WORKERS", str(FETCH_CONCURRENCY)))  # stores at once
+PIPELINE_NORMALIZE_WORKERS = int(os.getenv("PIPELINE_NORMALIZE_WORKERS", "2"))
+PIPELINE_SEND_WORKERS = int(os.getenv("PIPELINE_SEND_WORKERS", "4"))     # agents messaged at once
 
 # ==========================
 # WhatsApp Sending Config
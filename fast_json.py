@@ -0,0 +1,133 @@
+# fast_json.py
+"""JSON decoding for store API pages.
+
+Uses orjson when it is installed and falls back to the stdlib json module
+otherwise. iter_json_array() hands out the orders of a page one at a time,
+so a caller can normalize each order as soon as it is decoded.
+
+    python fast_json.py bench page1.json [page2.json ...]   # compare decoders
+"""
+import json
+import sys
+import time
+import tracemalloc
+from typing import Any, Iterator, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def decode_response(resp) -> Any:
+    """Faster stand-in for resp.json() on a requests.Response."""
+    return loads(resp.content)
+
+
+def _skip_ws(text: str, idx: int) -> int:
+    while idx < len(text) and text[idx] in _WHITESPACE:
+        idx += 1
+    return idx
+
+
+def _expect(text: str, idx: int, char: str) -> int:
+    idx = _skip_ws(text, idx)
+    if idx >= len(text) or text[idx] != char:
+        raise ValueError(f"Expected {char!r} at position {idx}")
+    return idx + 1
+
+
+def _stdlib_iter_array(text: str, key: Optional[str]) -> Iterator[Any]:
+    idx = 0
+    if key is not None:
+        # walk the top-level object until we reach `key`, skipping other values
+        idx = _expect(text, idx, "{")
+        while True:
+            idx = _skip_ws(text, idx)
+            if idx < len(text) and text[idx] == "}":
+                return  # key not present
+            name, idx = _decoder.raw_decode(text, idx)
+            idx = _expect(text, idx, ":")
+            if name == key:
+                break
+            _, idx = _decoder.raw_decode(text, _skip_ws(text, idx))
+            idx = _skip_ws(text, idx)
+            if idx < len(text) and text[idx] == ",":
+                idx += 1
+
+    idx = _expect(text, idx, "[")
+    idx = _skip_ws(text, idx)
+    if idx < len(text) and text[idx] == "]":
+        return
+    while True:
+        item, idx = _decoder.raw_decode(text, _skip_ws(text, idx))
+        yield item
+        idx = _skip_ws(text, idx)
+        if idx < len(text) and text[idx] == ",":
+            idx += 1
+            continue
+        _expect(text, idx, "]")
+        return
+
+
+def iter_json_array(data: Union[bytes, str], key: Optional[str] = None) -> Iterator[Any]:
+    """Yield the elements of a JSON array one by one.
+
+    `data` is either a top-level array (WooCommerce pages) or an object
+    whose `key` holds the array (Shopify's {"orders": [...]}). With orjson
+    the page is decoded in one go, which is still faster. The stdlib path
+    decodes one element at a time, so only the elements still referenced
+    are kept as Python objects.
+    """
+    if orjson is not None:
+        doc = orjson.loads(data)
+        items = doc.get(key, []) if key is not None else doc
+        yield from items
+        return
+    if isinstance(data, bytes):
+        data = data.decode("utf-8")
+    yield from _stdlib_iter_array(data, key)
+
+
+# ==========================
+# Benchmark
+# ==========================
+def _bench(paths) -> None:
+    for path in paths:
+        with open(path, "rb") as f:
+            raw = f.read()
+        key = "orders" if raw.lstrip()[:1] == b"{" else None
+        print(f"📄 {path}: {len(raw) / 1024:.0f} KiB")
+
+        cases = [("json.loads (stdlib)", lambda: json.loads(raw))]
+        if orjson is not None:
+            cases.append(("orjson.loads", lambda: orjson.loads(raw)))
+        cases.append(("stdlib incremental", lambda: sum(1 for _ in _stdlib_iter_array(raw.decode(), key))))
+
+        for label, fn in cases:
+            runs = 5
+            start = time.perf_counter()
+            for _ in range(runs):
+                fn()
+            per_run = (time.perf_counter() - start) / runs * 1000
+            tracemalloc.start()
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"   {label:<22} {per_run:8.1f} ms   peak {peak / 1024:8.0f} KiB")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "bench":
+        _bench(sys.argv[2:])
+    else:
+        print(__doc__)
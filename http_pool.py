@@ -0,0 +1,44 @@
+# http_pool.py
+import threading
+from typing import Dict
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from config import HTTP_POOL_MAXSIZE
+
+_sessions: Dict[str, requests.Session] = {}
+_lock = threading.Lock()
+
+
+def get_session(url: str) -> requests.Session:
+    """Return the shared keep-alive session for `url`'s host.
+
+    Every store fetcher and page worker talking to one host goes through the
+    same connection pool, so TCP/TLS handshakes are paid once per process
+    rather than once per fetch. Sessions live until close_all(), which lets
+    a long-running process keep its connections warm between polls.
+    Per-store credentials are passed per request, never stored here.
+    """
+    parsed = urlparse(url)
+    key = f"{parsed.scheme}://{parsed.netloc}"
+    with _lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            # pool_block: page workers wait for a free connection instead of
+            # opening throwaway ones beyond the pool size
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_MAXSIZE,
+                                  pool_block=True)
+            session.mount(key + "/", adapter)
+            session.headers.update({"Accept-Encoding": "gzip, deflate",
+                                    "Connection": "keep-alive"})
+            _sessions[key] = session
+        return session
+
+
+def close_all() -> None:
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
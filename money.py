@@ -0,0 +1,89 @@
+# money.py
+"""Exact money amounts for the normalizer, kept as integer kobo (1/100 naira).
+
+Store APIs send prices as strings such as "12500.00", "₦12,500" or
+"$1,234.5". parse_kobo reads them in one pass, with no exceptions and no
+float rounding: currency signs, thousands separators and spaces are
+skipped, a leading "-" or "(" makes the amount negative, and anything past
+two decimal places is rounded half up. Text that has no digits is 0.
+Scientific notation ("1e3", "1.5E+2") is rare enough to go through Decimal;
+if that cannot read it either, the amount is 0 and a warning is printed.
+Order pages repeat the same literals ("0.00", the same product price), so
+string results are cached.
+"""
+import re
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import lru_cache
+from typing import Any, Iterable, List
+
+_CENT = Decimal("0.01")
+_EXPONENT = re.compile(r"[0-9][eE][+-]?[0-9]")
+
+
+def _parse_exponent(text: str, negative: bool) -> int:
+    start = next(i for i, ch in enumerate(text) if "0" <= ch <= "9")
+    number = "".join(ch for ch in text[start:] if ch in "0123456789.eE+-")
+    try:
+        kobo = int(Decimal(number).quantize(_CENT, rounding=ROUND_HALF_UP) * 100)
+    except (InvalidOperation, ValueError):
+        print(f"⚠️ Could not read amount {text!r}, using 0")
+        return 0
+    return -kobo if negative else kobo
+
+
+@lru_cache(maxsize=4096)
+def _parse_text(text: str) -> int:
+    units = frac = 0
+    frac_digits = -1  # -1 until the decimal point is seen
+    negative = seen_digit = False
+    for ch in text:
+        if "0" <= ch <= "9":
+            seen_digit = True
+            if frac_digits < 0:
+                units = units * 10 + (ord(ch) - 48)
+            elif frac_digits < 3:  # a third digit is enough to round half up
+                frac = frac * 10 + (ord(ch) - 48)
+                frac_digits += 1
+        elif ch == ".":
+            if frac_digits >= 0:
+                break
+            frac_digits = 0
+        elif ch in "-(" and not seen_digit:
+            negative = True
+        elif ch in "eE" and seen_digit and _EXPONENT.search(text):
+            return _parse_exponent(text, negative)
+
+    if frac_digits <= 0:
+        kobo = units * 100
+    elif frac_digits == 1:
+        kobo = units * 100 + frac * 10
+    elif frac_digits == 2:
+        kobo = units * 100 + frac
+    else:
+        kobo = units * 100 + (frac + 5) // 10
+    return -kobo if negative else kobo
+
+
+def parse_kobo(value: Any) -> int:
+    """Amount in kobo from a str / int / float / Decimal; None and junk are 0."""
+    if value is None or value == "":
+        return 0
+    if isinstance(value, str):
+        return _parse_text(value)
+    if isinstance(value, int):
+        return value * 100
+    if isinstance(value, (float, Decimal)):
+        return int(Decimal(str(value)).quantize(_CENT, rounding=ROUND_HALF_UP) * 100)
+    return _parse_text(str(value))
+
+
+def parse_many(values: Iterable[Any]) -> List[int]:
+    """parse_kobo over a batch, e.g. every discount allocation of a line item."""
+    return [parse_kobo(v) for v in values]
+
+
+def format_kobo(kobo: int) -> str:
+    """Kobo back to a plain decimal string for the sheet, e.g. 295000 → "2950.00"."""
+    sign = "-" if kobo < 0 else ""
+    kobo = abs(kobo)
+    return f"{sign}{kobo // 100}.{kobo % 100:02d}"
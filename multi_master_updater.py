@@ -1,80 +1,268 @@
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-from typing import List
-from config import CREDS_FILE, MASTER_SHEET_ID, HEADERS
-from multi_store_fetcher import fetch_all_new_orders
+import sys
+import threading
+import time
+from typing import Callable, Collection, List, Optional
+from config import MASTER_SHEET_ID, HEADERS, APPEND_BATCH_ROWS
+from canonical import phone_as_text
+from multi_store_fetcher import fetch_all_new_orders, iter_new_order_pages, commit_fetched
 from normalizer import normalize_order
+from order_index import OrderIndex, ORDER_COL, row_key
+from sheet_reader import read_header, remember_header
+from sheets_client import get_client
+import state_store
 
 
 # ==========================
 # Google Sheets Helpers
 # ==========================
 def _gs_client():
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/drive"
-    ]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(CREDS_FILE, scope)
-    return gspread.authorize(creds)
+    return get_client()
 
 
 def _ensure_headers(worksheet):
-    first = worksheet.row_values(1)
+    first = read_header(worksheet)
     if not first:
         worksheet.append_row(HEADERS, value_input_option="USER_ENTERED")
+        remember_header(worksheet, HEADERS)
+    elif len(first) < len(HEADERS) and HEADERS[:len(first)] == first:
+        # columns added to the end of HEADERS (e.g. "agent in charge")
+        worksheet.update("1:1", [HEADERS])
+        remember_header(worksheet, HEADERS)
 
 
-def _load_existing_ids(ws) -> set:
-    """Load ORDER NUMBERs already in master sheet to avoid duplicates."""
+def _open_master(client):
+    #ws = client.open_by_key(MASTER_SHEET_ID).sheet1
+    ws = client.open_by_key(MASTER_SHEET_ID).worksheet("test")
+    _ensure_headers(ws)
+    return ws
+
+
+def open_master():
+    """The master worksheet, with its header row in place."""
+    return _open_master(_gs_client())
+
+
+def load_order_index(ws) -> OrderIndex:
+    """Bring the local index of orders on the master sheet up to date."""
+    index = OrderIndex(ws)
+    try:
+        read = index.sync()
+        print(f"🔎 Order index: {len(index)} orders ({read} new rows read).")
+    except Exception as e:
+        print(f"⚠️ Could not sync order index, using last known state: {e}")
+    return index
+
+
+def normalize_or_quarantine(entry: dict) -> List[List[str]]:
+    """normalize_order, except that an order it fails on is quarantined and gives no rows.
+
+    The order leaves staging, so it no longer holds back its store's
+    checkpoint or the rest of the batch; it stays in the state store's
+    quarantined_orders table to be looked at by hand.
+    """
     try:
-        all_vals = ws.get_all_values()[1:]  # skip headers
-        return {r[1] for r in all_vals if len(r) > 1 and r[1]}
-    except Exception:
-        return set()
+        return normalize_order(entry)
+    except Exception as e:
+        order = entry.get("order") or {}
+        print(f"⚠️ {entry.get('source_name')}: order {order.get('id')} could not be normalized,"
+              f" quarantined: {e!r}")
+        state_store.quarantine_order(entry.get("source_name", "unknown"), entry.get("platform", ""),
+                                     order, repr(e))
+        return []
+
+
+def _order_number_key(val: List[str]):
+    raw = str(val[ORDER_COL]).lstrip("#")
+    return (0, int(raw), "") if raw.isdigit() else (1, 0, raw)
+
+
+def append_batch(ws, index: OrderIndex, rows: List[List[str]],
+                 entries: Optional[List[dict]] = None) -> None:
+    """Append rows to the master, then commit the fetched orders they came from.
+
+    Rows are sorted by order number (in place), written with their phone
+    cells as text and added to `index`. Only then do `entries` move their
+    stores' checkpoints, so if the append raises they stay staged.
+    """
+    if rows:
+        rows.sort(key=_order_number_key)
+        ws.append_rows(phone_as_text(rows), value_input_option="USER_ENTERED")
+        index.add_keys(row_key(r) for r in rows)
+    if entries:
+        commit_fetched(entries)
+
+
+def _append_streaming(ws, index: OrderIndex,
+                      on_batch: Optional[Callable[[List[List[str]]], None]] = None,
+                      stores: Optional[Collection[str]] = None) -> int:
+    """Normalize and append page by page, in batches of APPEND_BATCH_ROWS.
+
+    Store checkpoints are committed after each successful append, covering
+    exactly the orders whose rows that append wrote (or skipped as duplicates).
+    `on_batch` is then called with the appended rows, so a later stage can
+    start on them straight away.
+    """
+    batch: List[List[str]] = []
+    batch_entries: List[dict] = []
+    total = 0
+
+    def _flush():
+        nonlocal total
+        append_batch(ws, index, batch, batch_entries)
+        batch_entries.clear()
+        if batch:
+            total += len(batch)
+            print(f"✅ Appended batch of {len(batch)} rows ({total} so far).")
+            appended = list(batch)
+            batch.clear()
+            if on_batch is not None:
+                on_batch(appended)
+
+    for page in iter_new_order_pages(stores):
+        batch_entries.extend(page)
+        for entry in page:
+            for r in normalize_or_quarantine(entry):
+                if row_key(r) not in index:
+                    batch.append(r)
+        if len(batch) >= APPEND_BATCH_ROWS:
+            _flush()
+    _flush()
+
+    if not total:
+        print("✅ Nothing new to append.")
+    else:
+        print(f"✅ Added {total} new rows to Master.")
+    return total
+
+
+class MasterBatchWriter:
+    """Collects rows from many producers and appends them to the master in batches.
+
+    Rows are flushed from a background thread once `max_rows` are waiting
+    or the oldest has waited `max_wait` seconds. Orders already on the sheet,
+    or already queued, are skipped, so redelivered webhooks and the polling
+    sweep do not create duplicates. A failed append is kept and retried on
+    the next flush.
+    """
+
+    def __init__(self, ws, index: OrderIndex, max_rows: int, max_wait: float):
+        self.ws = ws
+        self.index = index
+        self.max_rows = max_rows
+        self.max_wait = max_wait
+        self._rows: List[List[str]] = []
+        self._queued_ids: set = set()
+        self._first_at = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="master-writer", daemon=True)
+        self._thread.start()
+
+    def add(self, rows: List[List[str]]) -> int:
+        """Queue rows for the master; returns how many were not duplicates."""
+        with self._lock:
+            taken = [r for r in rows
+                     if row_key(r) not in self._queued_ids and row_key(r) not in self.index]
+            if not taken:
+                return 0
+            self._rows.extend(taken)
+            self._queued_ids.update(row_key(r) for r in taken)
+            if self._first_at is None:
+                self._first_at = time.monotonic()
+            if len(self._rows) >= self.max_rows:
+                self._wake.set()
+        return len(taken)
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(timeout=self.max_wait)
+            self._wake.clear()
+            with self._lock:
+                due = self._rows and (len(self._rows) >= self.max_rows or
+                                      time.monotonic() - self._first_at >= self.max_wait)
+            if due:
+                self.flush()
+
+    def flush(self) -> int:
+        with self._lock:
+            batch, self._rows, self._first_at = self._rows, [], None
+        if not batch:
+            return 0
+        try:
+            append_batch(self.ws, self.index, batch)
+        except Exception as e:
+            print(f"⚠️ Master append of {len(batch)} rows failed, will retry: {e}")
+            with self._lock:
+                self._rows[:0] = batch
+                self._first_at = time.monotonic()
+            return 0
+        with self._lock:
+            self._queued_ids.difference_update(row_key(r) for r in batch)
+        print(f"✅ Appended {len(batch)} rows to Master.")
+        return len(batch)
+
+    def close(self) -> None:
+        """Stop the background thread and flush whatever is still queued."""
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+
+
+def open_master_writer(max_rows: int, max_wait: float) -> MasterBatchWriter:
+    ws = open_master()
+    return MasterBatchWriter(ws, load_order_index(ws), max_rows, max_wait)
 
 
 # ==========================
 # Main Appender
 # ==========================
-def append_new_orders_to_master() -> int:
+def append_new_orders_to_master(stream: bool = False,
+                                on_batch: Optional[Callable[[List[List[str]]], None]] = None,
+                                stores: Optional[Collection[str]] = None) -> int:
+    """Fetch new orders from every store and append them to the master sheet.
+
+    With `stream=True` stores are read page by page and rows are appended in
+    bounded batches as they arrive, instead of after everything is fetched.
+    `on_batch` receives the rows of each successful append. `stores` limits
+    the run to the stores with those names.
+    """
+    if stream:
+        ws = open_master()
+        return _append_streaming(ws, load_order_index(ws), on_batch, stores)
+
     # 1. Fetch from all stores
-    orders = fetch_all_new_orders()
+    orders = fetch_all_new_orders(stores=stores)
     if not orders:
         print("✅ No new orders fetched from stores.")
         return 0
 
     # 2. Connect to sheet
-    client = _gs_client()
-    #ws = client.open_by_key(MASTER_SHEET_ID).sheet1
-    ws = client.open_by_key(MASTER_SHEET_ID).worksheet("test")
-
-    _ensure_headers(ws)
+    ws = open_master()
 
     # 3. Avoid duplicates
-    existing_ids = _load_existing_ids(ws)
+    index = load_order_index(ws)
 
     # 4. Normalize → rows
     rows: List[List[str]] = []
     for entry in orders:
-        normalized = normalize_order(entry)
+        normalized = normalize_or_quarantine(entry)
         for r in normalized:
-            if str(r[1]) not in existing_ids:  # ORDER NUMBER column
+            if row_key(r) not in index:
                 rows.append(r)
 
     if not rows:
         print("✅ Nothing new to append (all duplicates).")
+        commit_fetched(orders)
         return 0
 
-    # ✅ Sort rows by ORDER NUMBER (column index 1)
-    def order_number_key(val: List[str]):
-        raw = str(val[1]).lstrip("#")
-        return int(raw) if raw.isdigit() else raw
-
-    rows.sort(key=order_number_key)
-
-    # 5. Append rows
-    ws.append_rows(rows, value_input_option="USER_ENTERED")
+    # 5. Append rows (sorted by order id), then let the stores' checkpoints
+    # move. If the append fails the orders stay staged and the next run retries them.
+    append_batch(ws, index, rows, orders)
     print(f"✅ Added {len(rows)} new rows to Master.")
+    if on_batch is not None:
+        on_batch(rows)
     return len(rows)
 
 
@@ -82,4 +270,4 @@ def append_new_orders_to_master() -> int:
 # CLI Execution
 # ==========================
 if __name__ == "__main__":
-    append_new_orders_to_master()
+    append_new_orders_to_master(stream="--stream" in sys.argv)
@@ -161,96 +161,252 @@ if __name__ == "__main__":
     orders = fetch_all_new_orders()
     print(f"Total fetched across stores: {len(orders)}")
 '''
-import os
+import queue
 import time
+import threading
 import requests
-from typing import List, Dict, Any
-from config import STORES, STATE_DIR
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import List, Dict, Any, Callable, Collection, Iterator, Optional, Union
+from urllib.parse import urlparse
+from config import (STORES, FETCH_CONCURRENCY, STORE_FETCH_DEADLINE_SECONDS,
+                    WOO_PAGE_CONCURRENCY, STORE_REQUEST_TIMEOUT, STORE_MAX_RETRIES,
+                    STORE_BACKOFF_BASE, STORE_BACKOFF_MAX, WOO_REQUESTS_PER_SECOND,
+                    WOO_BURST, SHOPIFY_REQUESTS_PER_SECOND, SHOPIFY_BURST,
+                    STORE_FIELD_PROJECTION, BREAKER_PROBE_DEADLINE_SECONDS,
+                    ORDER_JOURNAL_ENABLED, JOURNAL_EXTRA_FIELDS)
+from normalizer import WOO_ORDER_FIELDS, SHOPIFY_ORDER_FIELDS
+import fast_json
+import http_pool
+import order_journal
+import poll_schedule
+import state_store
+import store_health
+from rate_limit import TokenBucket, backoff_delay, retry_after_seconds
 
 
 # ==========================
 # Helpers
 # ==========================
-def _ensure_state_dir():
-    os.makedirs(STATE_DIR, exist_ok=True)
-
-
-def _sanitize_name(name: str) -> str:
-    return "".join(c for c in name if c.isalnum() or c in ("-", "_")).strip("_")
+def _load_last_id(store_name: str) -> int:
+    """Where the next fetch starts: past the checkpoint and anything already staged."""
+    return max(state_store.load_last_order_id(store_name),
+               state_store.max_staged_order_id(store_name))
 
 
-def _last_id_path(store_name: str) -> str:
-    _ensure_state_dir()
-    return os.path.join(STATE_DIR, f"last_order_id_{_sanitize_name(store_name)}.txt")
+def _projected_fields(reads) -> str:
+    """fields= value: what the normalizer reads, plus what the journal keeps."""
+    extra = JOURNAL_EXTRA_FIELDS if ORDER_JOURNAL_ENABLED else []
+    return ",".join(dict.fromkeys([*reads, *extra]))
 
 
-def _load_last_id(store_name: str) -> int:
-    p = _last_id_path(store_name)
-    if not os.path.exists(p):
-        return 0
-    with open(p, "r") as f:
-        s = f.read().strip()
-        return int(s) if s.isdigit() else 0
+# ==========================
+# Request Scheduling
+# ==========================
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+# a time.monotonic() value, or a callable returning one for a deadline that moves
+_Deadline = Union[float, Callable[[], float]]
+
+
+def _bucket_for(url: str) -> TokenBucket:
+    """One token bucket per store host, sized for that store's platform."""
+    host = urlparse(url).netloc
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            stype = next((s.get("type", "woo").lower() for s in STORES
+                          if s.get("url") and urlparse(s["url"]).netloc == host), "woo")
+            if stype == "shopify":
+                bucket = TokenBucket(SHOPIFY_REQUESTS_PER_SECOND, SHOPIFY_BURST)
+            else:
+                bucket = TokenBucket(WOO_REQUESTS_PER_SECOND, WOO_BURST)
+            _buckets[host] = bucket
+        return bucket
 
 
-def _save_last_id(store_name: str, order_id: int) -> None:
-    p = _last_id_path(store_name)
-    with open(p, "w") as f:
-        f.write(str(order_id))
-
+def _observe_call_limit(bucket: TokenBucket, resp) -> None:
+    """Slow down before Shopify throttles us, using its call-limit header ("32/40")."""
+    raw = resp.headers.get("X-Shopify-Shop-Api-Call-Limit")
+    if not raw or "/" not in raw:
+        return
+    used, _, size = raw.partition("/")
+    try:
+        used, size = int(used), int(size)
+    except ValueError:
+        return
+    if size and used >= 0.8 * size:
+        # let the store's bucket drain back to half full before the next call
+        bucket.pause((used - size / 2) / SHOPIFY_REQUESTS_PER_SECOND)
+
+
+def _wait_before_retry(delay: float, deadline: Optional[float], url: str) -> None:
+    if deadline is not None and time.monotonic() + delay > deadline:
+        raise TimeoutError(f"⏰ Store deadline reached while retrying {url}")
+    if delay > 0:
+        time.sleep(delay)
+
+
+def _safe_request(session, url, deadline: Optional[_Deadline] = None, **kwargs):
+    """Rate-limited GET with up to STORE_MAX_RETRIES attempts.
+
+    Requests to one host share a token bucket. 429/503 honour Retry-After
+    (pausing the whole host), connection resets are retried at once, other
+    timeouts and 5xx back off exponentially with jitter, and any other 4xx
+    is raised straight away. If `deadline` (a time.monotonic() value) is
+    given, timeouts are clamped to the time left and no wait may pass it.
+    A callable deadline is read once per request.
+    """
+    if callable(deadline):
+        deadline = deadline()
+    bucket = _bucket_for(url)
+    tries = STORE_MAX_RETRIES
+
+    for attempt in range(tries):
+        timeout = STORE_REQUEST_TIMEOUT
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"⏰ Store deadline reached before requesting {url}")
+            timeout = min(timeout, remaining)
+        bucket.acquire(deadline=deadline)
 
-def _safe_request(session, url, **kwargs):
-    """Retry wrapper for requests with 3 attempts."""
-    for attempt in range(3):
         try:
-            resp = session.get(url, timeout=60, **kwargs)  # 60s timeout
-            resp.raise_for_status()
-            return resp
-        except requests.exceptions.ReadTimeout:
-            print(f"⏳ Timeout (attempt {attempt+1}/3) for {url}, retrying...")
-            time.sleep(5)
-        except Exception as e:
-            print(f"⚠️ Request failed (attempt {attempt+1}/3): {e}")
-            time.sleep(5)
+            resp = session.get(url, timeout=timeout, **kwargs)
+        except requests.exceptions.Timeout:
+            print(f"⏳ Timeout (attempt {attempt+1}/{tries}) for {url}, retrying...")
+            _wait_before_retry(backoff_delay(attempt, STORE_BACKOFF_BASE, STORE_BACKOFF_MAX), deadline, url)
+            continue
+        except requests.exceptions.ConnectionError as e:
+            # resets are usually transient: retry at once, back off after that
+            print(f"🔌 Connection error (attempt {attempt+1}/{tries}): {e}")
+            if attempt:
+                _wait_before_retry(backoff_delay(attempt, STORE_BACKOFF_BASE, STORE_BACKOFF_MAX), deadline, url)
+            continue
+
+        _observe_call_limit(bucket, resp)
+
+        if resp.status_code in (429, 503):
+            wait = retry_after_seconds(resp.headers.get("Retry-After"))
+            if wait is None:
+                wait = backoff_delay(attempt, STORE_BACKOFF_BASE, STORE_BACKOFF_MAX)
+            print(f"🐢 Throttled with {resp.status_code} (attempt {attempt+1}/{tries}), waiting {wait:.1f}s")
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise TimeoutError(f"⏰ Store deadline reached while throttled on {url}")
+            bucket.pause(wait)  # the next acquire() waits this out, for every worker
+            continue
+        if resp.status_code >= 500:
+            print(f"⚠️ Server error {resp.status_code} (attempt {attempt+1}/{tries}) for {url}")
+            _wait_before_retry(backoff_delay(attempt, STORE_BACKOFF_BASE, STORE_BACKOFF_MAX), deadline, url)
+            continue
+
+        resp.raise_for_status()  # other 4xx won't get better by retrying
+        return resp
+
     raise Exception(f"❌ Request failed after retries: {url}")
 
 
 # ==========================
 # WooCommerce Fetcher
 # ==========================
-def _fetch_woo(store: Dict[str, Any], last_id: int) -> List[Dict[str, Any]]:
+def _fetch_woo_pages(session, base: str, auth, params: Dict[str, Any], pages,
+                     deadline: Optional[_Deadline] = None) -> List[List[Dict[str, Any]]]:
+    """Fetch the given page numbers in parallel and return their bodies in page order."""
+    pages = list(pages)
+    if not pages:
+        return []
+
+    def _one(page: int):
+        r = _safe_request(session, base, deadline, auth=auth, params={**params, "page": page})
+        return fast_json.decode_response(r)
+
+    workers = max(1, min(WOO_PAGE_CONCURRENCY, len(pages)))
+    if workers == 1:
+        return [_one(page) for page in pages]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="woo-page") as pool:
+        return list(pool.map(_one, pages))
+
+
+def _woo_first_new_page(session, base: str, auth, params: Dict[str, Any],
+                        seen: Dict[int, List[Dict[str, Any]]], total_pages: int,
+                        last_id: int, deadline: Optional[_Deadline] = None) -> int:
+    """Return the first page (of id-ascending pages) that holds an id > last_id.
+
+    Only O(log total_pages) pages are requested; every page read is kept in
+    `seen` so the caller does not fetch it twice. Returns total_pages + 1
+    when no page holds new orders.
+    """
+    def _has_new(page: int) -> bool:
+        if page not in seen:
+            r = _safe_request(session, base, deadline, auth=auth, params={**params, "page": page})
+            seen[page] = fast_json.decode_response(r)
+        body = seen[page]
+        # an empty page means we ran past the end, so treat it as "new"
+        return not body or body[-1].get("id", 0) > last_id
+
+    lo, hi = 1, total_pages + 1
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if _has_new(mid):
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+def _iter_woo_pages(store: Dict[str, Any], last_id: int,
+                    deadline: Optional[_Deadline] = None) -> Iterator[List[Dict[str, Any]]]:
+    """Yield pages of WooCommerce orders newer than last_id, oldest first.
+
+    Pages are fetched WOO_PAGE_CONCURRENCY at a time, so only that many
+    are held in memory while the caller works on them.
+    """
     base = store["url"].rstrip("/") + "/wp-json/wc/v3/orders"
     auth = (store["consumer_key"], store["consumer_secret"])
-    session = requests.Session()
+    session = http_pool.get_session(base)
 
-    params = {"per_page": 100, "orderby": "id", "order": "asc",
-              "min_id": last_id + 1, "page": 1}
-    new_orders = []
+    params = {"per_page": 100, "orderby": "id", "order": "asc", "min_id": last_id + 1}
+    projection = {"_fields": _projected_fields(WOO_ORDER_FIELDS)} if STORE_FIELD_PROJECTION else {}
+    params.update(projection)
+    first = 1
 
+    resp = None
     try:
-        resp = _safe_request(session, base, auth=auth, params=params)
-        if resp.status_code == 400:
-            raise RuntimeError("min_id unsupported")
-        new_orders.extend(resp.json())
-
+        resp = _safe_request(session, base, deadline, auth=auth, params={**params, "page": 1})
+    except requests.exceptions.HTTPError as e:
+        if e.response is None or e.response.status_code != 400:
+            raise
+    body = fast_json.decode_response(resp) if resp is not None else []
+
+    # Older stores reject min_id with a 400, and some silently drop it and
+    # list from the oldest order. Pages are sorted by id either way, so
+    # binary-search for the first page with new orders and read from there.
+    if resp is None or (last_id > 0 and body and body[0].get("id", 0) <= last_id):
+        params = {"per_page": 100, "orderby": "id", "order": "asc", **projection}
+        if resp is None:
+            resp = _safe_request(session, base, deadline, auth=auth, params={**params, "page": 1})
+            body = fast_json.decode_response(resp)
+        # an ignored min_id already gave us page 1 of the plain listing
         total_pages = int(resp.headers.get("X-WP-TotalPages", "1"))
-        for page in range(2, total_pages + 1):
-            params["page"] = page
-            r = _safe_request(session, base, auth=auth, params=params)
-            new_orders.extend(r.json())
-    except Exception:
-        # fallback (when min_id not supported)
-        params_fb = {"per_page": 100, "orderby": "id", "order": "asc", "page": 1}
-        r0 = _safe_request(session, base, auth=auth, params=params_fb)
-        new_orders.extend([o for o in r0.json() if o.get("id", 0) > last_id])
-
-        total_pages = int(r0.headers.get("X-WP-TotalPages", "1"))
-        for page in range(2, total_pages + 1):
-            params_fb["page"] = page
-            r = _safe_request(session, base, auth=auth, params=params_fb)
-            new_orders.extend([o for o in r.json() if o.get("id", 0) > last_id])
+        seen = {1: body}
+        first = _woo_first_new_page(session, base, auth, params, seen,
+                                    total_pages, last_id, deadline)
+        seen = {p: page_body for p, page_body in seen.items() if p >= first}
+    else:
+        total_pages = int(resp.headers.get("X-WP-TotalPages", "1"))
+        seen = {1: body}
 
-    return [o for o in new_orders if o.get("id", 0) > last_id]
+    page = first
+    while page <= total_pages:
+        chunk = list(range(page, min(page + WOO_PAGE_CONCURRENCY, total_pages + 1)))
+        missing = [p for p in chunk if p not in seen]
+        seen.update(zip(missing, _fetch_woo_pages(session, base, auth, params,
+                                                  missing, deadline)))
+        for p in chunk:
+            fresh = [o for o in seen.pop(p) if o.get("id", 0) > last_id]
+            if fresh:
+                yield fresh
+        page = chunk[-1] + 1
 
 
 # ==========================
@@ -295,42 +451,164 @@ def _fetch_shopify(store: Dict[str, Any], last_id: int) -> List[Dict[str, Any]]:
 # ==========================
 # Main Aggregator
 # ==========================
-def fetch_all_new_orders() -> List[Dict[str, Any]]:
-    all_found: List[Dict[str, Any]] = []
+def _fetch_store(job: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Fetch one store within its own deadline (runs on a worker thread).
+
+    The outcome is recorded in the store's health/circuit-breaker state. A
+    half-open probe gets BREAKER_PROBE_DEADLINE_SECONDS so a store that is
+    still down costs little. If the deadline hits after some pages came in,
+    those pages are returned (and staged by the caller) and the fetch counts
+    as healthy, so a long catch-up makes progress run by run.
+    """
+    name, store, stype, last_id = job["name"], job["store"], job["stype"], job["last_id"]
+    iter_pages = _iter_woo_pages if stype == "woo" else _iter_shopify_pages
+    started = time.monotonic()
+    limit = BREAKER_PROBE_DEADLINE_SECONDS if job["probe"] else STORE_FETCH_DEADLINE_SECONDS
+    orders: List[Dict[str, Any]] = []
+    try:
+        for page in iter_pages(store, last_id, started + limit):
+            orders.extend(page)
+    except TimeoutError as e:
+        if not orders:
+            store_health.record_failure(name, time.monotonic() - started, str(e))
+            raise
+        print(f"⏰ {name}: deadline reached after {len(orders)} new orders, the rest comes next run")
+    except Exception as e:
+        store_health.record_failure(name, time.monotonic() - started, str(e))
+        raise
+    store_health.record_success(name, time.monotonic() - started)
+    return orders
+
+
+def _fetch_stores_concurrently(jobs: List[Dict[str, Any]]) -> List[Any]:
+    """Run _fetch_store for every job on a bounded pool.
+
+    Returns one outcome per job, in job order: the list of orders, or the
+    exception that stopped that store. A store that overruns its deadline
+    gets a TimeoutError and is left behind; the pool does not wait for it.
+    """
+    workers = max(1, min(FETCH_CONCURRENCY, len(jobs)))
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="store-fetch")
+    futures = [pool.submit(_fetch_store, job) for job in jobs]
+
+    # Jobs queued behind a busy pool start late, so allow one deadline per wave.
+    waves = -(-len(jobs) // workers)
+    wait_until = time.monotonic() + waves * STORE_FETCH_DEADLINE_SECONDS + 5
+
+    outcomes: List[Any] = []
+    for fut in futures:
+        try:
+            outcomes.append(fut.result(timeout=max(0, wait_until - time.monotonic())))
+        except FutureTimeout:
+            outcomes.append(TimeoutError(f"no result within {STORE_FETCH_DEADLINE_SECONDS}s deadline"))
+        except Exception as e:
+            outcomes.append(e)
 
-    for store in STORES:
-        name = store.get("name", "unknown")
-        stype = store.get("type", "woo").lower()
-        last_id = _load_last_id(name)
+    pool.shutdown(wait=False, cancel_futures=True)
+    return outcomes
 
-        try:
-            if stype == "woo":
-                orders = _fetch_woo(store, last_id)
-            elif stype == "shopify":
-                orders = _fetch_shopify(store, last_id)
-            else:
-                print(f"⚠️ Unknown store type for {name}: {stype}")
-                continue
 
-            if not orders:
-                print(f"➡️ {name}: no new orders (last_id={last_id})")
-                continue
+def _breaker_allows(name: str) -> Optional[str]:
+    """Return the breaker state to fetch under, or None to skip the store."""
+    state = store_health.allow_request(name)
+    if state == store_health.OPEN:
+        print(f"⛔ {name}: circuit open, skipping (next probe in {store_health.seconds_until_probe(name)}s)")
+        return None
+    if state == store_health.HALF_OPEN:
+        print(f"🩺 {name}: circuit half-open, sending a probe")
+    return state
 
-            max_id = max(o.get("id", 0) for o in orders)
-            _save_last_id(name, max_id)
 
-            for o in orders:
-                all_found.append({
-                    "source_name": name,
-                    "platform": stype,
-                    "order": o
-                })
+def _selected_stores(stores: Optional[Collection[str]]) -> List[Dict[str, Any]]:
+    """STORES, or only those named in `stores`."""
+    return [s for s in STORES if stores is None or s.get("name", "unknown") in stores]
 
-            print(f"✅ {name}: fetched {len(orders)} new orders (saved last_id={max_id})")
-        except Exception as e:
-            print(f"❌ Failed fetching {name}: {e}")
 
+def fetch_all_new_orders(concurrent: bool = True,
+                         stores: Optional[Collection[str]] = None) -> List[Dict[str, Any]]:
+    """Fetch new orders from every store in STORES (or only the `stores` named).
+
+    With `concurrent=True` each store is fetched on its own worker, so the
+    run takes as long as the slowest store rather than the sum of them.
+    Results are always combined in STORES order. Stores whose circuit
+    breaker is open are skipped.
+
+    Fetched orders are staged rather than checkpointed: the result also
+    holds orders staged by earlier runs, and nothing is marked as done
+    until the caller passes the appended entries to commit_fetched().
+    """
+    all_found: List[Dict[str, Any]] = []
+
+    jobs = []
+    names = []
+    for store in _selected_stores(stores):
+        name = store.get("name", "unknown")
+        stype = store.get("type", "woo").lower()
+        if stype not in ("woo", "shopify"):
+            print(f"⚠️ Unknown store type for {name}: {stype}")
+            continue
+        names.append(name)
+        state = _breaker_allows(name)
+        if state is None:
+            continue
+        jobs.append({"store": store, "name": name, "stype": stype,
+                     "last_id": _load_last_id(name), "probe": state == store_health.HALF_OPEN})
+
+    if concurrent and len(jobs) > 1:
+        outcomes = _fetch_stores_concurrently(jobs)
+    else:
+        outcomes = []
+        for job in jobs:
+            try:
+                outcomes.append(_fetch_store(job))
+            except Exception as e:
+                outcomes.append(e)
+
+    for job, orders in zip(jobs, outcomes):
+        name, stype, last_id = job["name"], job["stype"], job["last_id"]
+        poll_schedule.record_poll(name, 0 if isinstance(orders, Exception) else len(orders))
+        if isinstance(orders, Exception):
+            print(f"❌ Failed fetching {name}: {orders}")
+        elif not orders:
+            print(f"➡️ {name}: no new orders (last_id={last_id})")
+        else:
+            state_store.stage_orders(name, stype, orders)
+            order_journal.append_orders(name, stype, orders)
+            print(f"✅ {name}: fetched {len(orders)} new orders (staged after id {last_id})")
+
+    # hand back everything staged, including batches an earlier run fetched
+    # but never got onto the master sheet
+    for store in STORES:
+        name = store.get("name", "unknown")
+        if name not in names:
+            continue
+        stype = store.get("type", "woo").lower()
+        for o in state_store.load_staged_orders(name):
+            all_found.append({
+                "source_name": name,
+                "platform": stype,
+                "order": o
+            })
+
+    store_health.print_summary(names)
     return all_found
+
+
+def commit_fetched(entries: List[Dict[str, Any]]) -> None:
+    """Second phase of the store checkpoint: call once `entries` are on the master.
+
+    Moves each store's last_order_id up to the highest id in `entries` and
+    drops those orders from staging, all in one transaction.
+    """
+    top: Dict[str, int] = {}
+    for e in entries:
+        name = e["source_name"]
+        top[name] = max(top.get(name, 0), e["order"].get("id", 0))
+    with state_store.get_state_store().transaction():
+        for name, max_id in top.items():
+            state_store.commit_order_checkpoint(name, max_id)
+    for name, max_id in top.items():
+        print(f"💾 {name}: last_id saved as {max_id}")
 '''
 # ==========================
 # Shopify Fetcher (Fixed + Notes Support)
@@ -385,11 +663,12 @@ def _fetch_shopify(store: Dict[str, Any], last_id: int) -> List[Dict[str, Any]]:
     return new_orders
 
 '''
-def _fetch_shopify(store: Dict[str, Any], last_id: int) -> List[Dict[str, Any]]:
+def _iter_shopify_pages(store: Dict[str, Any], last_id: int,
+                        deadline: Optional[_Deadline] = None) -> Iterator[List[Dict[str, Any]]]:
+    """Yield pages of Shopify orders newer than last_id, as the API returns them."""
     base = store["url"].rstrip("/") + "/admin/api/2023-10/orders.json"
     headers = {"X-Shopify-Access-Token": store.get("access_token", "")}
-    session = requests.Session()
-    session.headers.update(headers)
+    session = http_pool.get_session(base)
 
     params = {
         "limit": 250,
@@ -397,31 +676,167 @@ def _fetch_shopify(store: Dict[str, Any], last_id: int) -> List[Dict[str, Any]]:
     }
     if last_id:
         params["since_id"] = last_id
+    if STORE_FIELD_PROJECTION:
+        params["fields"] = _projected_fields(SHOPIFY_ORDER_FIELDS)
 
-    new_orders = []
+    fetched = 0
     url = base
 
     for _ in range(2):  # fetch only 2 pages = 500 max
         if not url:
             break
-        resp = _safe_request(session, url, params=params)
-        body = resp.json()
-        items = body.get("orders", [])
-        new_orders.extend(items)
+        resp = _safe_request(session, url, deadline, params=params, headers=headers)
+        # Only orders newer than last_id; older ones are dropped as soon as
+        # they are decoded instead of after the whole page is built
+        fresh = []
+        for o in fast_json.iter_json_array(resp.content, "orders"):
+            fetched += 1
+            if o.get("id", 0) > last_id:
+                fresh.append(o)
+        if fresh:
+            yield fresh
 
         # Pagination check
         link = resp.headers.get("Link") or resp.headers.get("link")
-        if link and 'rel="next"' in link and len(new_orders) < 500:
+        if link and 'rel="next"' in link and fetched < 500:
             url = link.split(";")[0].strip(" <>")
             params = {}  # next URL already contains params
+            if STORE_FIELD_PROJECTION and "fields=" not in url:
+                params["fields"] = _projected_fields(SHOPIFY_ORDER_FIELDS)  # allowed with page_info
         else:
             url = None
 
-    # Only orders newer than last_id
-    filtered = [o for o in new_orders if o.get("id", 0) > last_id]
 
-    # Reverse to oldest → newest before returning
-    return list(reversed(filtered))
+def _stream_store(job: Dict[str, Any], out: "queue.Queue", stop: threading.Event) -> None:
+    """Fetch one store page by page within its deadline (runs on a worker thread).
+
+    Each page is staged and journaled, then put on `out` as order entries;
+    a final None marks the store as done. `out` is bounded, so a slow
+    caller holds the fetch back; time spent waiting for room on it does not
+    count toward the deadline, and once `stop` is set the worker gives up
+    waiting and exits. A deadline hit after some pages came in counts as a
+    healthy (partial) fetch: the rest follows on the next run.
+    """
+    name, store, stype, last_id = job["name"], job["store"], job["stype"], job["last_id"]
+    iter_pages = _iter_woo_pages if stype == "woo" else _iter_shopify_pages
+    started = time.monotonic()
+    limit = BREAKER_PROBE_DEADLINE_SECONDS if job["probe"] else STORE_FETCH_DEADLINE_SECONDS
+    count = 0
+    blocked = 0.0  # time spent waiting for room on `out`, which the deadline skips
+
+    def _deadline() -> float:
+        return started + limit + blocked
+
+    def _put(item) -> bool:
+        nonlocal blocked
+        waited = time.monotonic()
+        try:
+            while not stop.is_set():
+                try:
+                    out.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        finally:
+            blocked += time.monotonic() - waited
+
+    try:
+        for orders in iter_pages(store, last_id, _deadline):
+            count += len(orders)
+            state_store.stage_orders(name, stype, orders)
+            order_journal.append_orders(name, stype, orders)
+            if not _put([{"source_name": name, "platform": stype, "order": o} for o in orders]):
+                break  # the caller stopped reading; what we staged is picked up next run
+    except TimeoutError as e:
+        if not count:
+            store_health.record_failure(name, time.monotonic() - started, str(e))
+            print(f"❌ Failed fetching {name}: {e}")
+        else:
+            store_health.record_success(name, time.monotonic() - started)
+            print(f"⏰ {name}: deadline reached after {count} new orders, the rest comes next run")
+    except Exception as e:
+        store_health.record_failure(name, time.monotonic() - started, str(e))
+        print(f"❌ Failed fetching {name}: {e}")
+    else:
+        store_health.record_success(name, time.monotonic() - started)
+        if count:
+            print(f"✅ {name}: streamed {count} new orders")
+        else:
+            print(f"➡️ {name}: no new orders (last_id={last_id})")
+    finally:
+        poll_schedule.record_poll(name, count)
+        _put(None)
+
+
+def iter_new_order_pages(stores: Optional[Collection[str]] = None) -> Iterator[List[Dict[str, Any]]]:
+    """Streaming counterpart of fetch_all_new_orders.
+
+    Yields one list of order entries per fetched page, so callers can
+    normalize and append while later pages are still being fetched. The
+    orders earlier runs staged but never appended come first, then each
+    store's new pages as they arrive, in order within a store. Like
+    fetch_all_new_orders, up to FETCH_CONCURRENCY stores are fetched at
+    once, each with its own deadline (BREAKER_PROBE_DEADLINE_SECONDS for a
+    half-open probe), so one slow store does not hold up the others. Every page is staged before it is handed over;
+    the caller commits pages with commit_fetched() once their rows are on
+    the master sheet.
+    """
+    names, jobs = [], []
+    staged_pages: List[List[Dict[str, Any]]] = []
+    for store in _selected_stores(stores):
+        name = store.get("name", "unknown")
+        stype = store.get("type", "woo").lower()
+        if stype not in ("woo", "shopify"):
+            print(f"⚠️ Unknown store type for {name}: {stype}")
+            continue
+        names.append(name)
+
+        staged = state_store.load_staged_orders(name)
+        if staged:
+            print(f"♻️ {name}: retrying {len(staged)} staged orders")
+        staged_pages.extend([{"source_name": name, "platform": stype, "order": o} for o in staged[i:i + 100]]
+                            for i in range(0, len(staged), 100))
+
+        state = _breaker_allows(name)
+        if state is None:
+            continue
+        jobs.append({"store": store, "name": name, "stype": stype,
+                     "last_id": _load_last_id(name), "probe": state == store_health.HALF_OPEN})
+
+    workers = max(1, min(FETCH_CONCURRENCY, len(jobs)))
+    out: "queue.Queue" = queue.Queue(maxsize=2 * workers)  # pages fetched ahead of the caller
+    stop = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="store-stream")
+    for job in jobs:
+        pool.submit(_stream_store, job, out, stop)
+    try:
+        yield from staged_pages
+        del staged_pages
+
+        # stores queued behind a busy pool start late, so allow one deadline per wave
+        waves = -(-len(jobs) // workers)
+        wait_until = time.monotonic() + waves * STORE_FETCH_DEADLINE_SECONDS + 5
+        running = len(jobs)
+        while running:
+            try:
+                page = out.get(timeout=max(0, wait_until - time.monotonic()))
+            except queue.Empty:
+                print(f"⏰ {running} store(s) still fetching past their deadline, not waiting for them")
+                break
+            if page is None:
+                running -= 1
+            else:
+                handed = time.monotonic()
+                yield page
+                wait_until += time.monotonic() - handed  # workers were held up meanwhile
+    finally:
+        # pages fetched after the caller stops stay staged for the next run
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    store_health.print_summary(names)
+
 
 # ==========================
 # CLI Execution
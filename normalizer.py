@@ -126,9 +126,13 @@ def normalize_order(order_entry: Dict[str, Any]) -> List[List[str]]:
     else:
         return []
 '''
-from typing import Dict, Any, List
+from operator import methodcaller
+from typing import Any, Callable, Dict, List, Tuple
 from datetime import datetime
-from config import HEADERS
+from config import HEADERS, CANONICALIZE_ROWS
+from canonical import canonicalize_row
+from money import format_kobo, parse_kobo, parse_many
+from note_attributes import index_notes
 
 
 def _safe_get(d: Dict, keys: List[str], default=""):
@@ -141,62 +145,196 @@ def _safe_get(d: Dict, keys: List[str], default=""):
     return d
 
 
-def _get_note_attr(order: Dict[str, Any], key: str) -> str:
-    """Find a value in Shopify note_attributes by key name."""
-    for attr in order.get("note_attributes", []):
-        if attr.get("name", "").strip().lower() == key.strip().lower():
-            return attr.get("value", "")
-    return ""
+# ==========================
+# Field Mappings
+# ==========================
+# Each platform maps HEADERS names to where the value comes from:
+#   order_field(*path)  – a (nested) key of the order, or of what its prepare hook derived
+#   item_field(*path)   – a (nested) key of the line item, or of what its prepare hook derived
+#   SOURCE              – the store name the order came from
+# Headers a platform does not map are left blank. The mappings are compiled
+# once, at import, into tuples of getters laid out in HEADERS order, so
+# adding a store type means adding a mapping here.
+SOURCE = ("source", None)
 
 
-def normalize_woo(order: Dict[str, Any], source_name: str) -> List[List[str]]:
-    """Convert WooCommerce order JSON → list of rows for Google Sheets."""
-    rows = []
-    order_id = order.get("id")
-    created_at = order.get("date_created", "")[:10]
+def _getter(path: Tuple[str, ...], default: Any = "") -> Callable[[Dict[str, Any]], Any]:
+    """Compile a key path into one call: nested dicts are walked, missing keys give `default`."""
+    get = methodcaller("get", path[-1], default)
+    for key in reversed(path[:-1]):
+        get = (lambda inner, k: lambda d: inner(d.get(k) or {}))(get, key)
+    return get
 
-    billing = order.get("billing", {})
-    first_name = billing.get("first_name", "")
-    last_name = billing.get("last_name", "")
-    phone = billing.get("phone", "")
-    address = ", ".join(filter(None, [
-        billing.get("address_1", ""), billing.get("address_2", ""),
-        billing.get("city", ""), billing.get("state", ""), billing.get("country", "")
-    ]))
 
-    status = order.get("status", "")
-    line_items = order.get("line_items", [])
+def order_field(*path: str, default: Any = "") -> Tuple[str, Callable]:
+    return ("order", _getter(path, default))
 
-    for item in line_items:
 
-        product = item.get("name", "")
-        qty = item.get("quantity", 1)
-        price = item.get("total", "0")
-        sku = item.get("sku")
+def item_field(*path: str, default: Any = "") -> Tuple[str, Callable]:
+    return ("item", _getter(path, default))
 
-        row = [
-            first_name,  # FIRST NAME
-            last_name,  # LAST NAME
-            phone,  # PHONE NUMBER
-            billing.get("city", ""),  # LOCATION
-            address,  # ADDRESS
-            billing.get("city", ""),  # LOCATION
-            product,  # PRODUCT
-            qty,  # QUANTITY
-            price,  # PRICE
-            sku,  # SKU
-            "",  # DISCOUNT
-            "",  # SHIPPING FEE
-            "",  # TAX
-            "",  # ORDERGROUPID
-            order_id,  # ORDER NUMBER
-            source_name,  # source
-        ]
 
-        rows.append(row)
+def _join_address(address: Dict[str, Any], keys: Tuple[str, ...]) -> str:
+    return ", ".join(filter(None, (address.get(k, "") for k in keys)))
+
+
+def _prepare_woo(order: Dict[str, Any]) -> Dict[str, Any]:
+    billing = order.get("billing") or {}
+    return {"address": _join_address(billing, ("address_1", "address_2", "city", "state", "country"))}
+
+
+WOO_SCHEMA = {
+    "reads": ("id", "billing", "line_items"),
+    "prepare": _prepare_woo,
+    "prepare_item": None,
+    "columns": {
+        "FirstName": order_field("billing", "first_name"),
+        "LastName": order_field("billing", "last_name"),
+        "PhoneNumber": order_field("billing", "phone"),
+        "State": order_field("billing", "state"),
+        "Address": order_field("address"),
+        "City": order_field("billing", "city"),
+        "ProductName": item_field("name"),
+        "Quantity": item_field("quantity", default=1),
+        "LineTotal": item_field("total", default="0"),
+        "ProductSKU": item_field("sku", default=None),
+        "order id": order_field("id", default=None),
+        "source": SOURCE,
+    },
+}
+
 
+def _prepare_shopify(order: Dict[str, Any]) -> Dict[str, Any]:
+    notes = index_notes(order)
+    full_name = notes.get("full_name")
+    if full_name:
+        parts = full_name.strip().split(" ", 1)
+        first_name = parts[0]
+        last_name = parts[1] if len(parts) > 1 else ""
+    else:
+        customer = order.get("customer") or {}
+        first_name = customer.get("first_name", "")
+        last_name = customer.get("last_name", "")
+
+    address_obj = order.get("shipping_address") or order.get("billing_address") or {}
+    return {
+        "first_name": first_name,
+        "last_name": last_name,
+        "phone": notes.get("phone") or address_obj.get("phone", ""),
+        "state": notes.get("state") or address_obj.get("province", ""),
+        "address": notes.get("address") or _join_address(
+            address_obj, ("address1", "address2", "city", "province", "country")),
+        "city": notes.get("city") or address_obj.get("city", ""),
+    }
+
+
+def _prepare_shopify_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        qty = int(item.get("quantity", 1))
+    except Exception:
+        qty = 1
+    unit_price = parse_kobo(item.get("price"))
+
+    discount = parse_kobo(item.get("total_discount"))
+    if not discount and item.get("discount_allocations"):
+        discount = sum(abs(k) for k in parse_many(
+            alloc.get("amount") or ((alloc.get("amount_set") or {}).get("shop_money") or {}).get("amount")
+            for alloc in item["discount_allocations"]
+        ))
+    discount = abs(discount)
+
+    return {
+        "quantity": qty,
+        "line_total": format_kobo(unit_price * qty - discount),
+        "discount": format_kobo(discount),
+    }
+
+
+SHOPIFY_SCHEMA = {
+    "reads": ("id", "name", "note_attributes", "customer", "shipping_address",
+              "billing_address", "line_items"),
+    "prepare": _prepare_shopify,
+    "prepare_item": _prepare_shopify_item,
+    "columns": {
+        "FirstName": order_field("first_name"),
+        "LastName": order_field("last_name"),
+        "PhoneNumber": order_field("phone"),
+        "State": order_field("state"),
+        "Address": order_field("address"),
+        "City": order_field("city"),
+        "ProductName": item_field("title"),
+        "Quantity": item_field("quantity"),
+        "LineTotal": item_field("line_total"),
+        "ProductSKU": item_field("sku"),
+        "Discount": item_field("discount"),
+        "order id": order_field("name"),
+        "source": SOURCE,
+    },
+}
+
+# Top-level order fields each platform reads. The fetcher asks the store
+# APIs for only these (WooCommerce `_fields=`, Shopify `fields=`), so keep
+# a schema's "reads" in step with its columns and prepare hooks.
+WOO_ORDER_FIELDS = WOO_SCHEMA["reads"]
+SHOPIFY_ORDER_FIELDS = SHOPIFY_SCHEMA["reads"]
+
+
+# ==========================
+# Row Plans
+# ==========================
+def _compile(schema: Dict[str, Any]) -> Tuple:
+    """Lay a schema out against HEADERS: (prepare, prepare_item, order getters, item getters, source cols)."""
+    unknown = set(schema["columns"]) - set(HEADERS)
+    if unknown:
+        raise ValueError(f"Mapping names columns missing from HEADERS: {sorted(unknown)}")
+    order_cols, item_cols, source_cols = [], [], []
+    for col, name in enumerate(HEADERS):
+        level, get = schema["columns"].get(name, (None, None))
+        if level == "order":
+            order_cols.append((col, get))
+        elif level == "item":
+            item_cols.append((col, get))
+        elif level == "source":
+            source_cols.append(col)
+    return (schema["prepare"], schema["prepare_item"],
+            tuple(order_cols), tuple(item_cols), tuple(source_cols))
+
+
+_PLANS = {
+    "woo": _compile(WOO_SCHEMA),
+    "shopify": _compile(SHOPIFY_SCHEMA),
+}
+_WIDTH = len(HEADERS)
+
+
+def _build_rows(plan: Tuple, order: Dict[str, Any], source_name: str) -> List[List[Any]]:
+    prepare, prepare_item, order_cols, item_cols, source_cols = plan
+    ctx = {**order, **prepare(order)} if prepare else order
+
+    # order-level cells are filled once and copied for every line item
+    base = [""] * _WIDTH
+    for col, get in order_cols:
+        base[col] = get(ctx)
+    for col in source_cols:
+        base[col] = source_name
+    if CANONICALIZE_ROWS:
+        canonicalize_row(base)  # phone, state and city are order-level: once per order
+
+    rows = []
+    for item in order.get("line_items") or []:
+        if prepare_item:
+            item = {**item, **prepare_item(item)}
+        row = base.copy()
+        for col, get in item_cols:
+            row[col] = get(item)
+        rows.append(row)
     return rows
 
+
+def normalize_woo(order: Dict[str, Any], source_name: str) -> List[List[str]]:
+    """Convert WooCommerce order JSON → list of rows for Google Sheets."""
+    return _build_rows(_PLANS["woo"], order, source_name)
+
 #OLD LOGIC
 '''
 def normalize_shopify(order: Dict[str, Any], source_name: str) -> List[List[str]]:
@@ -340,124 +478,13 @@ def normalize_shopify(order: Dict[str, Any], source_name: str) -> List[List[str]
     return rows
 '''
 def normalize_shopify(order: Dict[str, Any], source_name: str) -> List[List[str]]:
-    rows = []
-
-    order_id = order.get("id")
-    created_at = order.get("created_at", "")[:10]
-
-    full_name = _get_note_attr(order, "Full name")
-    phone = _get_note_attr(order, "Phone")
-    address_note = _get_note_attr(order, "Address")
-    state = _get_note_attr(order, "State")
-    city = _get_note_attr(order, "City")
-    comments = _get_note_attr(order, "Note")
-
-    if full_name:
-        parts = full_name.strip().split(" ", 1)
-        first_name = parts[0]
-        last_name = parts[1] if len(parts) > 1 else ""
-    else:
-        customer = order.get("customer") or {}
-        first_name = customer.get("first_name", "")
-        last_name = customer.get("last_name", "")
-
-    address_obj = (
-        order.get("shipping_address")
-        or order.get("billing_address")
-        or {}
-    )
-
-    address = address_note or ", ".join(filter(None, [
-        address_obj.get("address1", ""),
-        address_obj.get("address2", ""),
-        address_obj.get("city", ""),
-        address_obj.get("province", ""),
-        address_obj.get("country", "")
-    ]))
-
-    line_items = order.get("line_items", [])
-
-    for item in line_items:
-        sku = item.get("sku", "")
-
-        try:
-            qty = int(item.get("quantity", 1))
-        except Exception:
-            qty = 1
-
-        # unit price
-        try:
-            unit_price = float(item.get("price", 0) or 0)
-        except Exception:
-            p = str(item.get("price", 0)).replace(",", "").replace("₦", "").replace("$", "")
-            unit_price = float(p) if p else 0.0
-
-        # discount
-        discount_value = 0.0
-
-        raw_td = item.get("total_discount")
-        if raw_td:
-            try:
-                discount_value = float(raw_td)
-            except Exception:
-                s = str(raw_td).replace(",", "").replace("₦", "").replace("$", "")
-                discount_value = float(s) if s else 0.0
-
-        if not discount_value and item.get("discount_allocations"):
-            for alloc in item.get("discount_allocations", []):
-                amt = alloc.get("amount") or (
-                    alloc.get("amount_set", {})
-                         .get("shop_money", {})
-                         .get("amount")
-                )
-                if amt:
-                    try:
-                        discount_value += abs(float(amt))
-                    except Exception:
-                        pass
-
-        discount_value = abs(discount_value)
-
-        line_total = round((unit_price * qty) - discount_value, 2)
-
-        # ✅ APPEND INSIDE LOOP
-        row = [
-            first_name,
-            last_name,
-            phone or address_obj.get("phone", ""),
-            city or address_obj.get("province", ""),
-            address,
-            city or address_obj.get("city", ""),
-            item.get("title", ""),
-            qty,
-            str(line_total),
-            sku,
-            str(discount_value),
-            "",  # SHIPPING FEE
-            "",  # TAX
-            "",  # ORDERGROUPID
-            order.get("name", ""),
-            order_id,
-            source_name,
-        ]
-
-        rows.append(row)
-
-    return rows
-
-
-
+    """Convert Shopify order JSON → list of rows for Google Sheets."""
+    return _build_rows(_PLANS["shopify"], order, source_name)
 
 
 def normalize_order(order_entry: Dict[str, Any]) -> List[List[str]]:
     """Normalize an order entry from fetch_all_new_orders into rows."""
-    platform = order_entry.get("platform")
-    source = order_entry.get("source_name")
-    raw = order_entry.get("order", {})
-
-    if platform == "woo":
-        return normalize_woo(raw, source)
-    elif platform == "shopify":
-        return normalize_shopify(raw, source)
-    else:
+    plan = _PLANS.get(order_entry.get("platform"))
+    if plan is None:
         return []
+    return _build_rows(plan, order_entry.get("order", {}), order_entry.get("source_name"))
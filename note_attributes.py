@@ -0,0 +1,48 @@
+# note_attributes.py
+"""Shopify note_attributes (custom checkout fields), indexed once per order.
+
+Checkout forms name the same field differently ("Full name", "Customer
+name", "phone number"...). config.NOTE_ATTRIBUTE_ALIASES maps each field
+to the names that carry it. The aliases are compiled once into one lookup
+table, and index_notes walks an order's attributes a single time, so the
+cost grows with the number of attributes, not attributes × fields.
+
+    notes = index_notes(order)
+    notes.get("phone")
+"""
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+from config import NOTE_ATTRIBUTE_ALIASES
+
+
+@lru_cache(maxsize=1024)
+def _norm(name: str) -> str:
+    return " ".join(name.split()).lower()
+
+
+def _compile(aliases: Dict[str, Any]) -> Dict[str, Tuple[str, int]]:
+    """alias name → (field, rank); a lower rank is an earlier, preferred alias."""
+    table: Dict[str, Tuple[str, int]] = {}
+    for field, names in aliases.items():
+        for rank, name in enumerate(names):
+            table.setdefault(_norm(name), (field, rank))
+    return table
+
+
+_ALIASES = _compile(NOTE_ATTRIBUTE_ALIASES)
+
+
+def index_notes(order: Dict[str, Any]) -> Dict[str, str]:
+    """field → value for every known field the order's note_attributes fill in."""
+    values: Dict[str, str] = {}
+    ranks: Dict[str, int] = {}
+    for attr in order.get("note_attributes") or []:
+        hit = _ALIASES.get(_norm(attr.get("name") or ""))
+        value = attr.get("value")
+        if hit is None or not value:
+            continue
+        field, rank = hit
+        if field not in ranks or rank < ranks[field]:
+            values[field] = value
+            ranks[field] = rank
+    return values
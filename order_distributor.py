@@ -149,61 +149,83 @@ if __name__ == "__main__":
     main()
 '''
 # order_distributor.py
-import os
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-from config import CREDS_FILE, MASTER_SHEET_ID, HEADERS, STATE_DIR
+from canonical import phone_as_text
+from config import MASTER_SHEET_ID, HEADERS
 from personal_sheets import PEOPLE
-
-TRACK_FILE = os.path.join(STATE_DIR, "last_distributed_row.txt")
-
-
-def _ensure_state_dir():
-    os.makedirs(STATE_DIR, exist_ok=True)
+from sheet_reader import col_letter, read_header, read_rows, remember_header
+from sheets_client import get_client
+import state_store
 
 
 def _load_last_distributed_row() -> int:
-    _ensure_state_dir()
-    if not os.path.exists(TRACK_FILE):
-        return 1
-    with open(TRACK_FILE, "r") as f:
-        s = f.read().strip()
-        return int(s) if s.isdigit() else 1
+    return state_store.load_last_distributed_row()
 
 
 def _save_last_distributed_row(n: int) -> None:
-    _ensure_state_dir()
-    with open(TRACK_FILE, "w") as f:
-        f.write(str(n))
+    state_store.save_last_distributed_row(n)
 
 
 def _gs_client():
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/drive",
-    ]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(CREDS_FILE, scope)
-    return gspread.authorize(creds)
+    return get_client()
 
 
 def _ensure_headers(ws):
-    current_headers = ws.row_values(1)
+    current_headers = read_header(ws)
     if not current_headers:
         ws.append_row(HEADERS, value_input_option="USER_ENTERED")
+        remember_header(ws, HEADERS)
     elif current_headers != HEADERS:
         ws.update("1:1", [HEADERS])  # overwrite with correct headers
+        remember_header(ws, HEADERS)
 
 
-def _agent_col_index() -> int:
-    """Find the 1-based column index for 'agent in charge' in HEADERS."""
-    if "agent in charge" in HEADERS:
-        return HEADERS.index("agent in charge") + 1
-    raise ValueError("'agent in charge' column not found in HEADERS")
+AGENT_COLUMN = "agent in charge"
 
 
-def manual_split(client, master, data, total_rows, person_sheets):
-    agent_col = _agent_col_index()
+def _agent_col_index(master) -> int:
+    """1-based column of 'agent in charge': where the master's header has it, else where HEADERS puts it."""
+    header = [h.strip() for h in read_header(master)]
+    if AGENT_COLUMN in header:
+        return header.index(AGENT_COLUMN) + 1
+    return HEADERS.index(AGENT_COLUMN) + 1
+
+
+def _agent_runs(assignments):
+    """Group (data row, agent, row) by consecutive data rows for the master's agent column."""
+    runs = []
+    for n, agent, _ in sorted(assignments, key=lambda a: a[0]):
+        if runs and n == runs[-1][0] + len(runs[-1][1]):
+            runs[-1][1].append([agent])
+        else:
+            runs.append((n, [[agent]]))
+    return runs
+
+
+def _write_assignments(master, person_sheets, assignments) -> None:
+    """Write (data row number, agent, row) assignments in as few calls as possible.
+
+    One append_rows per agent sheet, then one batch_update that marks the
+    agent column on the master for every assigned row.
+    """
+    agent_col = col_letter(_agent_col_index(master) - 1)
+
+    by_agent = {}
+    for _, agent, row in assignments:
+        row = row + [""] * (len(HEADERS) - len(row))  # pad properly
+        by_agent.setdefault(agent, []).append(row)
+    for agent, rows in by_agent.items():
+        person_sheets[agent].append_rows(phone_as_text(rows), value_input_option="USER_ENTERED")
+        print(f"✅ {len(rows)} rows assigned to {agent}")
 
+    # mark agent in Master; data row n is sheet row n + 1
+    master.batch_update(
+        [{"range": f"{agent_col}{n + 1}:{agent_col}{n + len(values)}", "values": values}
+         for n, values in _agent_runs(assignments)],
+        value_input_option="USER_ENTERED",
+    )
+
+
+def manual_split(client, master, total_rows, person_sheets):
     while True:
         try:
             start = int(input("Enter start row (relative to data, not including header): "))
@@ -220,19 +242,9 @@ def manual_split(client, master, data, total_rows, person_sheets):
                 print("❌ Invalid agent. Try again.")
                 continue
 
-            ws = person_sheets[agent_name]
-
-            rows_raw = data[start - 1:end]
-            rows_to_assign = []
-            for r in rows_raw:
-                r = r + [""] * (len(HEADERS) - len(r))  # pad properly
-                rows_to_assign.append(r)
-
-            ws.append_rows(rows_to_assign, value_input_option="USER_ENTERED")
-
-            # mark agent in Master
-            for row_num in range(start, end + 1):
-                master.update_cell(row_num + 1, agent_col, agent_name)
+            rows_raw = read_rows(master, start + 1, end + 1, width=len(HEADERS))  # +1 for header row
+            _write_assignments(master, person_sheets,
+                               [(n, agent_name, r) for n, r in enumerate(rows_raw, start=start)])
 
             print(f"✅ Assigned rows {start} → {end} to {agent_name} and marked in Master.")
 
@@ -248,59 +260,78 @@ def manual_split(client, master, data, total_rows, person_sheets):
             break
 
 
-def auto_split(client, master, data, last_idx, total_rows, person_sheets):
-    new_rows = data[last_idx:]
+def auto_split(client, master, new_rows, last_idx, person_sheets):
     if not new_rows:
         print("✅ No new rows to distribute.")
         return
 
     people = [p["name"] for p in PEOPLE]
     num_agents = len(people)
-    agent_col = _agent_col_index()
-
-    for i, row in enumerate(new_rows, start=last_idx + 1):
-        agent = people[(i - 1) % num_agents]  # round-robin
-        ws = person_sheets[agent]
-
-        row = row + [""] * (len(HEADERS) - len(row))
-        ws.append_row(row, value_input_option="USER_ENTERED")
-
-        # mark agent in Master
-        master.update_cell(i + 1, agent_col, agent)  # +1 for header row
 
-        print(f"✅ Row {i} assigned to {agent}")
+    # assign everything in memory first (round-robin), then write it in one go
+    assignments = [(i, people[(i - 1) % num_agents], row)
+                   for i, row in enumerate(new_rows, start=last_idx + 1)]
+    _write_assignments(master, person_sheets, assignments)
 
-    _save_last_distributed_row(total_rows)
+    _save_last_distributed_row(last_idx + len(new_rows))
     print("✅ Auto distribution complete.")
 
 
-def main():
+def _open_sheets():
     client = _gs_client()
     master = client.open_by_key(MASTER_SHEET_ID).sheet1
 
-    all_vals = master.get_all_values()
-    if not all_vals:
-        print("Master is empty.")
-        return
-
-    header, data = all_vals[0], all_vals[1:]
-    last_idx = _load_last_distributed_row()
-    total_rows = len(data)
-
-    print(f"Master sheet has {total_rows} rows (excluding header).")
-    print(f"Last distributed row: {last_idx}")
-
     person_sheets = {}
     for person in PEOPLE:
         ws = client.open_by_key(person["sheet_id"]).worksheets()[1]
         _ensure_headers(ws)
         person_sheets[person["name"]] = ws
+    return client, master, person_sheets
+
+
+def _pending_rows(master):
+    """(last distributed row, master rows past it), or None if the master is empty."""
+    header = read_header(master)
+    if not header:
+        return None
+    # only the rows past the checkpoint; data row n is sheet row n + 1
+    last_idx = _load_last_distributed_row()
+    return last_idx, read_rows(master, last_idx + 2, width=max(len(header), len(HEADERS)))
+
+
+def distribute_new_rows() -> int:
+    """Auto-distribute every undistributed master row, without prompting.
+
+    This is the entry point run_all.py uses; returns the number of rows
+    distributed.
+    """
+    client, master, person_sheets = _open_sheets()
+    pending = _pending_rows(master)
+    if pending is None:
+        print("Master is empty.")
+        return 0
+    last_idx, new_rows = pending
+    auto_split(client, master, new_rows, last_idx, person_sheets)
+    return len(new_rows)
+
+
+def main():
+    client, master, person_sheets = _open_sheets()
+    pending = _pending_rows(master)
+    if pending is None:
+        print("Master is empty.")
+        return
+
+    last_idx, new_rows = pending
+    total_rows = last_idx + len(new_rows)
+    print(f"Master sheet has {total_rows} rows (excluding header).")
+    print(f"Last distributed row: {last_idx}")
 
     mode = input("Choose mode: (m)anual or (a)uto? ").strip().lower()
     if mode == "m":
-        manual_split(client, master, data, total_rows, person_sheets)
+        manual_split(client, master, total_rows, person_sheets)
     elif mode == "a":
-        auto_split(client, master, data, last_idx, total_rows, person_sheets)
+        auto_split(client, master, new_rows, last_idx, person_sheets)
     else:
         print("❌ Invalid mode.")
 
@@ -0,0 +1,99 @@
+# order_index.py
+"""Local index of the orders already on the master sheet.
+
+Dedupe used to download the whole master sheet on every run. The index
+keeps one (source, order id) key per order in the state store and only
+reads the rows added to the sheet since the last sync, so its cost grows
+with the number of new orders rather than with the sheet's history.
+
+    python order_index.py rebuild     # re-read the whole sheet, e.g. after rows were deleted
+"""
+import sys
+from typing import Iterable, List
+from gspread.utils import ValueRenderOption
+from config import HEADERS
+from state_store import get_state_store
+from sheet_reader import read_rows
+
+ORDER_COL = HEADERS.index("order id")
+SOURCE_COL = HEADERS.index("source")
+
+
+def _cell(row: List, col: int) -> str:
+    return str(row[col]).strip() if len(row) > col and row[col] is not None else ""
+
+
+def row_key(row: List) -> str:
+    """Dedupe key of a master row: its source and order id."""
+    order_id = _cell(row, ORDER_COL)
+    return f"{_cell(row, SOURCE_COL)}|{order_id}" if order_id else ""
+
+
+class OrderIndex:
+    """The order keys present on one master worksheet, kept in the state store.
+
+    sync() reads the ORDER_COL..SOURCE_COL cells of rows added since the
+    last sync. Rows this process appends are added straight away through
+    add_keys(); the next sync reads them back too, which also picks up rows
+    that other writers (the webhook server, manual edits) appended.
+    """
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.sheet = f"{ws.spreadsheet_id}:{ws.id}"
+        self._store = get_state_store()
+        self._store.execute(
+            "CREATE TABLE IF NOT EXISTS master_index ("
+            " sheet TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (sheet, key)) WITHOUT ROWID"
+        )
+
+    @property
+    def _rows_key(self) -> str:
+        return f"master_index_rows:{self.sheet}"
+
+    def _read(self, first_row: int) -> List[List]:
+        return read_rows(self.ws, first_row, columns=(ORDER_COL, SOURCE_COL), width=len(HEADERS),
+                         value_render_option=ValueRenderOption.unformatted)
+
+    def sync(self) -> int:
+        """Index the rows appended since the last sync; returns how many were read."""
+        synced = self._store.get_int(self._rows_key, 1)  # row 1 holds the headers
+        rows = self._read(synced + 1)
+        with self._store.transaction():
+            self.add_keys(row_key(r) for r in rows)
+            self._store.set_int(self._rows_key, synced + len(rows))
+        return len(rows)
+
+    def rebuild(self) -> int:
+        """Re-index the whole sheet. It is read before the state store is locked."""
+        rows = self._read(2)
+        with self._store.transaction():
+            self._store.execute("DELETE FROM master_index WHERE sheet = ?", (self.sheet,))
+            self.add_keys(row_key(r) for r in rows)
+            self._store.set_int(self._rows_key, 1 + len(rows))
+        return len(rows)
+
+    def add_keys(self, keys: Iterable[str]) -> None:
+        self._store.executemany(
+            "INSERT OR IGNORE INTO master_index (sheet, key) VALUES (?, ?)",
+            [(self.sheet, k) for k in keys if k],
+        )
+
+    def __contains__(self, key: str) -> bool:
+        return bool(self._store.execute(
+            "SELECT 1 FROM master_index WHERE sheet = ? AND key = ?", (self.sheet, key)))
+
+    def __len__(self) -> int:
+        return self._store.execute(
+            "SELECT COUNT(*) FROM master_index WHERE sheet = ?", (self.sheet,))[0][0]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "rebuild":
+        from multi_master_updater import open_master
+
+        index = OrderIndex(open_master())
+        read = index.rebuild()
+        print(f"✅ Rebuilt master order index: {read} rows read, {len(index)} orders.")
+    else:
+        print(__doc__)
@@ -0,0 +1,135 @@
+# order_journal.py
+"""Append-only journal of the raw orders the stores sent us.
+
+Every order fetched by multi_store_fetcher (or received by webhook) is
+written once as a zlib-compressed record, and the state store indexes it
+by store and order id. Replaying the journal re-runs normalize_order over
+local data, so a mapping change in normalizer.py or config.HEADERS can be
+applied to months of orders without calling the store APIs again.
+
+Orders are journaled as fetched. With STORE_FIELD_PROJECTION on, that is
+the fields normalizer.py reads plus config.JOURNAL_EXTRA_FIELDS (dates,
+taxes, shipping lines, email...), so a new column can only be replayed
+from those; add a field there before you need it, or turn projection off
+to journal whole orders. Webhook orders are always journaled whole.
+
+    python order_journal.py replay [--store NAME] [--since-id N] [--csv out.csv]
+"""
+import argparse
+import csv
+import fcntl
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional
+from config import HEADERS, ORDER_JOURNAL_PATH, ORDER_JOURNAL_ENABLED
+from state_store import get_state_store
+import fast_json
+
+_HEADER = struct.Struct(">I")  # record length prefix
+_lock = threading.Lock()
+_table_ready = False
+
+
+def _index():
+    global _table_ready
+    store = get_state_store()
+    if not _table_ready:
+        store.execute(
+            "CREATE TABLE IF NOT EXISTS journal_index ("
+            " store TEXT NOT NULL, order_id INTEGER NOT NULL, platform TEXT NOT NULL,"
+            " offset INTEGER NOT NULL, length INTEGER NOT NULL, PRIMARY KEY (store, order_id))"
+        )
+        _table_ready = True
+    return store
+
+
+# ==========================
+# Writing
+# ==========================
+def append_orders(store_name: str, platform: str, orders: List[Dict[str, Any]]) -> None:
+    """Journal raw orders; a later copy of the same order id replaces the earlier one in the index."""
+    if not ORDER_JOURNAL_ENABLED or not orders:
+        return
+    records = [zlib.compress(json.dumps(o, separators=(",", ":")).encode()) for o in orders]
+
+    os.makedirs(os.path.dirname(ORDER_JOURNAL_PATH) or ".", exist_ok=True)
+    index_rows = []
+    with _lock, open(ORDER_JOURNAL_PATH, "ab") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)  # webhook server and cron runs may append at once
+        try:
+            offset = f.seek(0, os.SEEK_END)
+            for o, rec in zip(orders, records):
+                f.write(_HEADER.pack(len(rec)))
+                f.write(rec)
+                index_rows.append((store_name, o.get("id", 0), platform,
+                                   offset + _HEADER.size, len(rec)))
+                offset += _HEADER.size + len(rec)
+            f.flush()
+            os.fsync(f.fileno())
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+    _index().executemany(
+        "INSERT OR REPLACE INTO journal_index (store, order_id, platform, offset, length)"
+        " VALUES (?, ?, ?, ?, ?)", index_rows)
+
+
+# ==========================
+# Reading
+# ==========================
+def iter_journal(store_name: Optional[str] = None,
+                 since_id: int = 0) -> Iterator[Dict[str, Any]]:
+    """Yield journaled orders as fetch_all_new_orders entries, by store then order id."""
+    if not os.path.exists(ORDER_JOURNAL_PATH) or os.path.getsize(ORDER_JOURNAL_PATH) == 0:
+        return
+    sql = "SELECT store, platform, offset, length FROM journal_index WHERE order_id > ?"
+    params: list = [since_id]
+    if store_name:
+        sql += " AND store = ?"
+        params.append(store_name)
+    rows = _index().execute(sql + " ORDER BY store, order_id", params)
+
+    with open(ORDER_JOURNAL_PATH, "rb") as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for store, platform, offset, length in rows:
+            order = fast_json.loads(zlib.decompress(mm[offset:offset + length]))
+            yield {"source_name": store, "platform": platform, "order": order}
+
+
+def replay(store_name: Optional[str] = None, since_id: int = 0, out=None) -> int:
+    """Re-normalize journaled orders into CSV rows (HEADERS first); returns the row count."""
+    from normalizer import normalize_order
+
+    out = out or sys.stdout
+    writer = csv.writer(out)
+    writer.writerow(HEADERS)
+    count = 0
+    for entry in iter_journal(store_name, since_id):
+        for row in normalize_order(entry):
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Raw order journal tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    rp = sub.add_parser("replay", help="re-normalize journaled orders to CSV")
+    rp.add_argument("--store", help="only this store")
+    rp.add_argument("--since-id", type=int, default=0, help="only order ids above this")
+    rp.add_argument("--csv", help="write here instead of stdout")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    if args.csv:
+        with open(args.csv, "w", newline="") as fh:
+            n = replay(args.store, args.since_id, fh)
+    else:
+        n = replay(args.store, args.since_id)
+    print(f"✅ Replayed {n} rows in {time.monotonic() - started:.1f}s", file=sys.stderr)
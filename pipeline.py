@@ -0,0 +1,248 @@
+# pipeline.py
+"""Concurrent pipeline: every stage is a pool of workers joined by bounded queues.
+
+    fetch (PIPELINE_FETCH_WORKERS stores at once)
+      → normalize (PIPELINE_NORMALIZE_WORKERS)
+      → master append (one writer: keeps appends and checkpoints in order)
+      → distribution (one worker: owns last_distributed_row)
+      → WhatsApp (PIPELINE_SEND_WORKERS agents at once)
+
+Each queue holds at most PIPELINE_QUEUE_SIZE items, so a slow stage holds
+back the ones before it instead of piling up memory. While Twilio messages
+for one batch go out, later pages are already being fetched and appended.
+Distribution and sending coalesce whatever batches are waiting and work
+from their sheet checkpoints, so one run covers every waiting row.
+
+Pages are numbered as they are fetched, and the master writer puts the
+normalized pages back in that order before appending, so a store's
+checkpoint only ever moves over a contiguous run of appended pages. At
+most PIPELINE_QUEUE_SIZE + PIPELINE_NORMALIZE_WORKERS pages are between
+the fetchers and the master writer at once, so one slow page cannot make
+the writer buffer everything fetched after it. If a
+page fails to normalize or append, its store is not appended or committed
+again for the rest of the run; its pages stay staged for the next one.
+
+On SIGTERM / Ctrl-C the fetchers stop taking new pages, and everything
+already in the queues is drained through the remaining stages. Pages that
+were fetched but not appended stay staged for the next run.
+
+    python run_all.py --pipeline
+"""
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Collection, Dict, List, Optional
+from config import (STORES, APPEND_BATCH_ROWS, PIPELINE_QUEUE_SIZE, PIPELINE_FETCH_WORKERS,
+                    PIPELINE_NORMALIZE_WORKERS, PIPELINE_SEND_WORKERS)
+from multi_master_updater import append_batch, load_order_index, normalize_or_quarantine, open_master
+from multi_store_fetcher import iter_new_order_pages
+from order_distributor import distribute_new_rows
+from order_index import row_key
+from personal_sheets import PEOPLE
+from run_all import print_timings, run_stage
+from whatsapp_sender_new import send_new_rows_for_person
+
+_DONE = object()  # end-of-stream marker passed down the queues
+
+
+class Pipeline:
+    def __init__(self, stores: Optional[Collection[str]] = None):
+        self.store_names = [s.get("name", "unknown") for s in STORES
+                            if stores is None or s.get("name", "unknown") in stores]
+        self.pages: queue.Queue = queue.Queue(PIPELINE_QUEUE_SIZE)
+        self.rows: queue.Queue = queue.Queue(PIPELINE_QUEUE_SIZE)
+        self.appended: queue.Queue = queue.Queue(PIPELINE_QUEUE_SIZE)
+        self.distributed: queue.Queue = queue.Queue(PIPELINE_QUEUE_SIZE)
+        self.stop = threading.Event()
+        self.appended_rows = 0
+        self.blocked: set = set()  # stores not appended or committed again this run
+        self._seq = 0
+        self._seq_lock = threading.Lock()
+        # pages fetched but not yet taken in order by the master writer
+        self._in_flight = threading.Semaphore(PIPELINE_QUEUE_SIZE + PIPELINE_NORMALIZE_WORKERS)
+
+    # ----- stage 1: fetch -----
+    def _fetch(self, names: "queue.Queue[str]") -> None:
+        while not self.stop.is_set():
+            try:
+                name = names.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                for page in iter_new_order_pages([name]):
+                    self._in_flight.acquire()  # blocks while a page ahead of this one is slow
+                    with self._seq_lock:
+                        seq, self._seq = self._seq, self._seq + 1
+                    self.pages.put((seq, page))  # blocks while normalize is behind
+                    if self.stop.is_set():
+                        break  # the rest of this store stays staged / unfetched
+            except Exception as e:
+                print(f"❌ Fetching {name} failed: {e}")
+
+    # ----- stage 2: normalize -----
+    def _normalize(self) -> None:
+        while True:
+            item = self.pages.get()
+            if item is _DONE:
+                return
+            seq, page = item
+            try:
+                rows = [r for entry in page for r in normalize_or_quarantine(entry)]
+            except Exception as e:
+                print(f"❌ Normalizing a page of {len(page)} orders failed: {e}")
+                rows = None  # the master writer stops this store for the run
+            self.rows.put((seq, page, rows))
+
+    # ----- stage 3: master append -----
+    def _block(self, page_or_entries, reason: str) -> None:
+        for name in sorted({e["source_name"] for e in page_or_entries} - self.blocked):
+            self.blocked.add(name)
+            print(f"⚠️ {name}: {reason}; its later pages stay staged for the next run")
+
+    def _append(self) -> None:
+        try:
+            ws = open_master()
+            index = load_order_index(ws)
+        except Exception as e:
+            # keep consuming so the stages before this one can drain and stop
+            print(f"❌ Could not open the master sheet, stopping: {e}")
+            self.stop.set()
+            ws = index = None
+        queued = set()
+        waiting: Dict[int, Any] = {}  # normalized pages that came in ahead of their turn
+        next_seq = 0
+        open_producers = PIPELINE_NORMALIZE_WORKERS
+        while open_producers:
+            # wait for one page, then take whatever else is already waiting
+            items = [self.rows.get()]
+            while True:
+                try:
+                    items.append(self.rows.get_nowait())
+                except queue.Empty:
+                    break
+            for item in items:
+                if item is _DONE:
+                    open_producers -= 1
+                else:
+                    waiting[item[0]] = item
+
+            # append pages strictly in fetch order
+            entries: List[Dict[str, Any]] = []
+            batch: List[List[str]] = []
+            while next_seq in waiting:
+                _, page, rows = waiting.pop(next_seq)
+                next_seq += 1
+                self._in_flight.release()
+                if ws is None:
+                    continue
+                if rows is None:
+                    self._block(page, "a page failed to normalize")
+                    continue
+                if page[0]["source_name"] in self.blocked:
+                    continue
+                entries.extend(page)
+                for r in rows:
+                    key = row_key(r)
+                    if key not in queued and key not in index:
+                        queued.add(key)
+                        batch.append(r)
+                if len(batch) >= APPEND_BATCH_ROWS:
+                    self._write_master(ws, index, entries, batch)
+                    entries, batch = [], []
+            if entries:
+                self._write_master(ws, index, entries, batch)
+        if waiting:
+            print(f"⚠️ {len(waiting)} normalized pages never got their turn, left staged")
+        self.appended.put(_DONE)
+
+    def _write_master(self, ws, index, entries, batch) -> None:
+        try:
+            append_batch(ws, index, batch, entries)
+        except Exception as e:
+            # the orders stay staged; the next run appends them
+            print(f"❌ Master append of {len(batch)} rows failed: {e}")
+            self._block(entries, "a master append failed")
+            return
+        if batch:
+            self.appended_rows += len(batch)
+            print(f"✅ Appended batch of {len(batch)} rows ({self.appended_rows} so far).")
+            self.appended.put(len(batch))
+
+    # ----- stage 4: distribution -----
+    @staticmethod
+    def _drain(q: queue.Queue) -> bool:
+        """Wait for one item, swallow the rest already waiting; True once _DONE came through."""
+        items = [q.get()]
+        while True:
+            try:
+                items.append(q.get_nowait())
+            except queue.Empty:
+                return any(i is _DONE for i in items)
+
+    def _distribute(self) -> None:
+        done = False
+        while not done:
+            done = self._drain(self.appended)
+            # the last pass also picks up rows appended by anyone else
+            distributed = run_stage("order distribution", distribute_new_rows)
+            if distributed:
+                self.distributed.put(distributed)
+        self.distributed.put(_DONE)
+
+    # ----- stage 5: WhatsApp -----
+    def _send(self) -> None:
+        done = False
+        with ThreadPoolExecutor(max_workers=PIPELINE_SEND_WORKERS,
+                                thread_name_prefix="whatsapp") as pool:
+            while not done:
+                done = self._drain(self.distributed)
+                # agents are sent to side by side; each agent's own rows stay in order
+                list(pool.map(lambda p: run_stage(f"WhatsApp to {p['name']}", send_new_rows_for_person, p),
+                              PEOPLE))
+
+    def run(self) -> int:
+        names: "queue.Queue[str]" = queue.Queue()
+        for n in self.store_names:
+            names.put(n)
+
+        fetchers = [threading.Thread(target=self._fetch, args=(names,), name=f"fetch-{i}")
+                    for i in range(max(1, min(PIPELINE_FETCH_WORKERS, len(self.store_names))))]
+        normalizers = [threading.Thread(target=self._normalize, name=f"normalize-{i}")
+                       for i in range(PIPELINE_NORMALIZE_WORKERS)]
+        tail = [threading.Thread(target=self._append, name="master-append"),
+                threading.Thread(target=self._distribute, name="distribute"),
+                threading.Thread(target=self._send, name="whatsapp")]
+        for t in fetchers + normalizers + tail:
+            t.start()
+
+        # shut down front to back so every queue drains before its consumers stop
+        for t in fetchers:
+            t.join()
+        for _ in normalizers:
+            self.pages.put(_DONE)
+        for t in normalizers:
+            t.join()
+            self.rows.put(_DONE)
+        for t in tail:
+            t.join()
+        return self.appended_rows
+
+
+def run_concurrent_pipeline(stores: Optional[Collection[str]] = None) -> int:
+    pipeline = Pipeline(stores)
+
+    def _request_stop(signum, frame):
+        print(f"🛑 Received signal {signum}, draining the pipeline...")
+        pipeline.stop.set()
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, _request_stop)
+        signal.signal(signal.SIGINT, _request_stop)
+
+    started = time.monotonic()
+    appended = pipeline.run()
+    print_timings()
+    print(f"\n🎉 Pipeline finished in {time.monotonic() - started:.1f}s ({appended} rows appended).\n")
+    return appended
@@ -0,0 +1,101 @@
+# pipeline_daemon.py
+"""Keep the pipeline running: stores → master → agents → WhatsApp, in a loop.
+
+Each store is polled on its own adaptive schedule (see poll_schedule.py),
+so busy stores are checked every few seconds and quiet ones back off.
+Due stores are polled side by side (up to FETCH_CONCURRENCY), each within
+its own fetch deadline, and a store that is still being polled is simply
+skipped, so one hung store never holds up the others. Appended batches
+are distributed and sent straight away, and a sweep every
+DAEMON_DELIVER_SECONDS picks up rows appended by anything else. Store
+connections, the Sheets client and its caches stay warm between cycles.
+SIGTERM or Ctrl-C lets the polls in flight finish and exits cleanly.
+
+    python pipeline_daemon.py
+"""
+import signal
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List
+from config import STORES, DAEMON_DELIVER_SECONDS, FETCH_CONCURRENCY
+from multi_master_updater import append_new_orders_to_master
+from run_all import deliver_new_rows, print_timings, run_stage
+import http_pool
+import poll_schedule
+
+_stop = threading.Event()
+_wake = threading.Event()      # a poll finished or appended rows, or a stop was asked
+_appended = threading.Event()  # rows reached the master since the last delivery
+
+
+def _request_stop(signum, frame) -> None:
+    print(f"🛑 Received signal {signum}, finishing the polls in flight...")
+    _stop.set()
+    _wake.set()
+
+
+def _store_names() -> List[str]:
+    return [s.get("name", "unknown") for s in STORES
+            if s.get("type", "woo").lower() in ("woo", "shopify")]
+
+
+def _rows_appended(rows=None) -> None:
+    _appended.set()
+    _wake.set()
+
+
+def _poll_store(name: str) -> None:
+    """Fetch one store and append its new orders (runs on a poll worker)."""
+    try:
+        run_stage(f"master update ({name})", append_new_orders_to_master,
+                  stream=True, stores=[name], on_batch=_rows_appended)
+        # not polled after all (open circuit): wait a full interval
+        if poll_schedule.due_stores([name]):
+            poll_schedule.record_poll(name, 0)
+    finally:
+        _wake.set()
+
+
+def run_daemon() -> None:
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+
+    names = _store_names()
+    polling: Dict[str, Future] = {}
+    last_delivery = 0.0
+
+    print(f"🛰️ Pipeline daemon started for {len(names)} stores.")
+    with ThreadPoolExecutor(max_workers=max(1, min(FETCH_CONCURRENCY, len(names))),
+                            thread_name_prefix="poll") as pool:
+        while not _stop.is_set():
+            for name in [n for n, fut in polling.items() if fut.done()]:
+                del polling[name]
+            idle = [n for n in names if n not in polling]
+            for name in poll_schedule.due_stores(idle):
+                polling[name] = pool.submit(_poll_store, name)
+
+            # one delivery at a time, from this thread: it owns the distribution checkpoints
+            if _appended.is_set() or time.monotonic() - last_delivery >= DAEMON_DELIVER_SECONDS:
+                _appended.clear()
+                deliver_new_rows()
+                last_delivery = time.monotonic()
+
+            idle = [n for n in names if n not in polling]
+            wait = min(poll_schedule.seconds_until_due(idle),
+                       DAEMON_DELIVER_SECONDS - (time.monotonic() - last_delivery))
+            _wake.wait(max(1.0, wait))
+            _wake.clear()
+        if polling:
+            print(f"⏳ Waiting for {len(polling)} poll(s) in flight...")
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    if _appended.is_set():
+        deliver_new_rows()
+    http_pool.close_all()
+    print_timings()
+    print("✅ Pipeline daemon stopped.")
+
+
+if __name__ == "__main__":
+    run_daemon()
@@ -0,0 +1,59 @@
+# poll_schedule.py
+"""When to poll each store next, from how fast its orders have been arriving.
+
+Every poll records how many new orders a store returned. The arrival rate
+jumps up as soon as a poll sees orders faster than before, and otherwise
+decays over about POLL_RATE_WINDOW_SECONDS. The next poll is scheduled
+so that roughly POLL_TARGET_ORDERS orders are waiting, kept between
+POLL_MIN_SECONDS and POLL_MAX_SECONDS. Busy stores are polled every few
+seconds and quiet ones back off. State is kept in the state store, so the
+schedule survives restarts.
+"""
+import math
+import time
+from typing import Any, Dict, List, Optional
+from config import POLL_MIN_SECONDS, POLL_MAX_SECONDS, POLL_TARGET_ORDERS, POLL_RATE_WINDOW_SECONDS
+from state_store import get_state_store
+
+
+def load_schedule(store_name: str) -> Dict[str, Any]:
+    schedule = {"rate": 0.0, "last_poll": 0.0, "next_poll": 0.0}
+    schedule.update(get_state_store().get_json(f"poll_schedule:{store_name}", {}))
+    return schedule
+
+
+def _interval(rate: float) -> float:
+    if rate <= 0:
+        return POLL_MAX_SECONDS
+    return min(POLL_MAX_SECONDS, max(POLL_MIN_SECONDS, POLL_TARGET_ORDERS / rate))
+
+
+def record_poll(store_name: str, new_orders: int, now: Optional[float] = None) -> float:
+    """Fold one poll's result into the store's arrival rate; returns seconds to the next poll."""
+    now = time.time() if now is None else now
+    schedule = load_schedule(store_name)
+    if schedule["last_poll"]:
+        elapsed = max(1.0, now - schedule["last_poll"])
+        weight = math.exp(-elapsed / POLL_RATE_WINDOW_SECONDS)
+        observed = new_orders / elapsed
+        # rise at once when orders speed up, fall back slowly when they stop
+        schedule["rate"] = max(observed, weight * schedule["rate"] + (1 - weight) * observed)
+    elif new_orders:
+        schedule["rate"] = new_orders / POLL_RATE_WINDOW_SECONDS  # first poll: spread over the window
+
+    interval = _interval(schedule["rate"])
+    schedule.update(last_poll=now, next_poll=now + interval)
+    get_state_store().set_json(f"poll_schedule:{store_name}", schedule)
+    return interval
+
+
+def due_stores(store_names: List[str], now: Optional[float] = None) -> List[str]:
+    now = time.time() if now is None else now
+    return [n for n in store_names if load_schedule(n)["next_poll"] <= now]
+
+
+def seconds_until_due(store_names: List[str], now: Optional[float] = None) -> float:
+    now = time.time() if now is None else now
+    if not store_names:
+        return POLL_MAX_SECONDS
+    return max(0.0, min(load_schedule(n)["next_poll"] for n in store_names) - now)
@@ -0,0 +1,70 @@
+# rate_limit.py
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`.
+
+    Callers take a token with acquire(); when the bucket is empty they wait
+    their turn instead of failing. pause() holds everybody back, e.g. while
+    a server's Retry-After window runs out.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        if now > self._stamp:
+            self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+
+    def acquire(self, tokens: float = 1.0, deadline: Optional[float] = None) -> None:
+        """Take `tokens`, sleeping until they are available.
+
+        Raises TimeoutError (without taking anything) if the wait would run
+        past `deadline`, a time.monotonic() value.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= tokens
+            wait = max(0.0, self._stamp - now) + max(0.0, -self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                self._tokens += tokens
+                raise TimeoutError(f"⏰ Rate limit wait of {wait:.1f}s would pass the deadline")
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for the next `seconds`, then restart from empty."""
+        with self._lock:
+            self._tokens = min(self._tokens, 0.0)
+            self._stamp = max(self._stamp, time.monotonic() + seconds)
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter for the given 0-based attempt."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
@@ -1,24 +1,81 @@
 # run_all.py
-import subprocess
-
-def run_script(script_name):
-    print(f"\n🚀 Running {script_name}...\n")
-    result = subprocess.run(["python3", script_name], capture_output=True, text=True)
-    if result.returncode == 0:
-        print(f"✅ {script_name} finished successfully.\n")
-        print(result.stdout)
-    else:
-        print(f"❌ {script_name} failed!\n")
-        print(result.stderr)
+"""Run the whole pipeline in one process: stores → master → agents → WhatsApp.
+
+The stages are imported and called as functions, so they share one Sheets
+client, its caches and the state store, and their output shows up while
+they run. Orders are fetched in streaming mode: stores are fetched side by
+side, each within its own deadline, and each batch appended to the master
+is handed straight to distribution and WhatsApp sending, instead of
+waiting for every store to finish. A last pass picks up rows appended by
+anything else (e.g. the webhook server).
+
+    python run_all.py               # batch hand-over between stages
+    python run_all.py --no-stream   # each stage runs once, in order
+    python run_all.py --pipeline    # all stages at once, joined by queues (pipeline.py)
+"""
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict
+from multi_master_updater import append_new_orders_to_master
+from order_distributor import distribute_new_rows
+from whatsapp_sender_new import send_new_personal_rows_via_whatsapp
+
+_timings: Dict[str, Dict[str, float]] = {}
+_timings_lock = threading.Lock()  # stages may run on several threads (pipeline.py)
+
+
+def run_stage(name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run one stage, time it, and keep the pipeline going if it fails."""
+    print(f"\n🚀 Running {name}...\n")
+    started = time.monotonic()
+    failed = False
+    try:
+        result = fn(*args, **kwargs)
+    except Exception as e:
+        failed = True
+        print(f"❌ {name} failed: {e}\n")
+        result = None
+    elapsed = time.monotonic() - started
+    with _timings_lock:
+        stats = _timings.setdefault(name, {"runs": 0, "seconds": 0.0, "failed": 0})
+        stats["runs"] += 1
+        stats["seconds"] += elapsed
+        stats["failed"] += failed
+    print(f"⏱️ {name} took {elapsed:.1f}s.\n")
+    return result
 
-if __name__ == "__main__":
-    # Step 1: Fetch new orders into master sheet
-    run_script("multi_master_updater.py")
 
-    # Step 2: Distribute orders to agents
-    run_script("order_distributor.py")
+def deliver_new_rows(rows=None) -> None:
+    """Distribute the master rows past the checkpoint, then WhatsApp them to the agents."""
+    run_stage("order distribution", distribute_new_rows)
+    run_stage("WhatsApp sending", send_new_personal_rows_via_whatsapp)
 
-    # Step 3: Send orders to WhatsApp
-    run_script("whatsapp_sender.py")
 
-    print("\n🎉 All steps completed!\n")
+def print_timings() -> None:
+    print("⏱️ Stage timings:")
+    for name, stats in _timings.items():
+        line = f"   {name}: {stats['seconds']:.1f}s over {int(stats['runs'])} run(s)"
+        if stats["failed"]:
+            line += f", {int(stats['failed'])} failed"
+        print(line)
+
+
+def run_pipeline(stream: bool = True) -> None:
+    started = time.monotonic()
+    # in streaming mode the master update's time includes the batches it hands over
+    run_stage("master update", append_new_orders_to_master,
+              stream=stream, on_batch=deliver_new_rows if stream else None)
+    deliver_new_rows()
+    print_timings()
+    print(f"\n🎉 All steps completed in {time.monotonic() - started:.1f}s!\n")
+
+
+if __name__ == "__main__":
+    sys.stdout.reconfigure(line_buffering=True)  # stream progress even under cron
+    if "--pipeline" in sys.argv:
+        from pipeline import run_concurrent_pipeline  # pipeline.py imports this module
+
+        run_concurrent_pipeline()
+    else:
+        run_pipeline(stream="--no-stream" not in sys.argv)
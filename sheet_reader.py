@@ -0,0 +1,96 @@
+# sheet_reader.py
+"""Range-projected reads from Google Sheets, shared by every stage.
+
+Instead of get_all_values() on a whole worksheet, read only the rows past a
+checkpoint and only the columns a stage uses, in one batch_get. Header rows
+change rarely, so they are cached in the state store for
+SHEET_HEADER_TTL_SECONDS.
+"""
+import time
+from typing import List, Optional, Sequence, Tuple
+from gspread.utils import rowcol_to_a1
+from config import SHEET_HEADER_TTL_SECONDS
+from state_store import get_state_store
+
+
+def _sheet_key(ws) -> str:
+    return f"{ws.spreadsheet_id}:{ws.id}"
+
+
+def col_letter(col: int) -> str:
+    """A1 letter of a 0-based column index."""
+    return rowcol_to_a1(1, col + 1)[:-1]
+
+
+# ==========================
+# Header Rows
+# ==========================
+def read_header(ws, max_age: float = SHEET_HEADER_TTL_SECONDS) -> List[str]:
+    """Row 1 of `ws`, from the cache when it is younger than `max_age` seconds."""
+    key = f"sheet_header:{_sheet_key(ws)}"
+    store = get_state_store()
+    cached = store.get_json(key)
+    if cached and time.time() - cached["at"] < max_age:
+        return cached["header"]
+    header = ws.row_values(1)
+    store.set_json(key, {"at": time.time(), "header": header})
+    return header
+
+
+def remember_header(ws, header: List[str]) -> None:
+    """Record a header row we just wrote, so the next read_header() needs no call."""
+    get_state_store().set_json(f"sheet_header:{_sheet_key(ws)}",
+                               {"at": time.time(), "header": list(header)})
+
+
+def columns_for(header: List[str], names: Sequence[str]) -> List[int]:
+    """0-based indexes of the `names` present in `header` (others are skipped)."""
+    stripped = [h.strip() for h in header]
+    return [stripped.index(n) for n in names if n in stripped]
+
+
+# ==========================
+# Row Ranges
+# ==========================
+def _column_runs(columns: Sequence[int]) -> List[Tuple[int, int]]:
+    """Group column indexes into contiguous (first, last) runs, one A1 range each."""
+    runs: List[Tuple[int, int]] = []
+    for c in sorted(set(columns)):
+        if runs and c == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], c)
+        else:
+            runs.append((c, c))
+    return runs
+
+
+def read_rows(ws, start_row: int, end_row: Optional[int] = None,
+              columns: Optional[Sequence[int]] = None, width: Optional[int] = None,
+              value_render_option=None) -> List[List[str]]:
+    """Read sheet rows `start_row`..`end_row` (1-based, inclusive; open-ended if None).
+
+    Only `columns` (0-based indexes) are fetched; by default every column of
+    the header. Rows come back padded to `width` (default: header width) with
+    "" in the columns that were not read, so callers can keep indexing rows
+    by header position. Trailing rows that are empty in every requested
+    column are not returned.
+    """
+    if width is None:
+        width = len(read_header(ws))
+    if columns is None:
+        columns = range(width)
+    runs = _column_runs(columns)
+    if not runs:
+        return []
+    width = max(width, runs[-1][1] + 1)
+
+    end = "" if end_row is None else str(end_row)
+    ranges = [f"{col_letter(first)}{start_row}:{col_letter(last)}{end}" for first, last in runs]
+    results = ws.batch_get(ranges, value_render_option=value_render_option)
+
+    count = max((len(r) for r in results), default=0)
+    rows = [[""] * width for _ in range(count)]
+    for (first, _), values in zip(runs, results):
+        for i, cells in enumerate(values):
+            rows[i][first:first + len(cells)] = cells
+    return rows
+
@@ -0,0 +1,104 @@
+# sheets_client.py
+"""The one Google Sheets client every stage uses.
+
+CREDS_FILE is parsed once per process and the client (one authorized
+session, going through sheets_quota) is reused. The OAuth access token is
+kept in the state store until it expires, so a fresh process skips the
+token exchange. open_by_key() returns the same handle on every call, and
+spreadsheet metadata (the worksheet list behind worksheet(), sheet1 and
+worksheets()) is cached for SHEET_METADATA_TTL_SECONDS, so opening a
+worksheet costs no API call.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+import gspread
+from google.auth.transport.requests import Request
+from gspread.spreadsheet import Spreadsheet
+from oauth2client.service_account import ServiceAccountCredentials
+from config import CREDS_FILE, SHEET_METADATA_TTL_SECONDS
+from sheets_quota import GovernedHTTPClient
+from state_store import get_state_store
+
+SCOPES = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive",
+]
+TOKEN_EXPIRY_MARGIN = 120  # seconds; refresh a cached token this long before it expires
+
+_client: Optional["CachedClient"] = None
+_lock = threading.Lock()
+
+
+# ==========================
+# Access Token
+# ==========================
+def _token_key(auth) -> str:
+    return f"sheets_token:{getattr(auth, 'service_account_email', 'default')}"
+
+
+def _load_token(auth) -> None:
+    """Reuse the cached access token if it is still good, else fetch and cache a new one."""
+    store = get_state_store()
+    cached = store.get_json(_token_key(auth))
+    if cached and cached["expiry"] - TOKEN_EXPIRY_MARGIN > time.time():
+        auth.token = cached["token"]
+        # google-auth keeps expiry as naive UTC
+        auth.expiry = datetime.fromtimestamp(cached["expiry"], timezone.utc).replace(tzinfo=None)
+        return
+    auth.refresh(Request())
+    store.set_json(_token_key(auth), {
+        "token": auth.token,
+        "expiry": auth.expiry.replace(tzinfo=timezone.utc).timestamp(),
+    })
+
+
+# ==========================
+# Spreadsheet Handles
+# ==========================
+class CachedSpreadsheet(Spreadsheet):
+    """Spreadsheet whose metadata comes from the state store while it is fresh."""
+
+    def fetch_sheet_metadata(self, params=None):
+        if params is not None:
+            return super().fetch_sheet_metadata(params)
+        key = f"sheet_metadata:{self.id}"
+        store = get_state_store()
+        cached = store.get_json(key)
+        if cached and time.time() - cached["at"] < SHEET_METADATA_TTL_SECONDS:
+            return cached["metadata"]
+        metadata = super().fetch_sheet_metadata()
+        store.set_json(key, {"at": time.time(), "metadata": metadata})
+        return metadata
+
+    def forget_metadata(self) -> None:
+        """Drop the cached metadata, e.g. after adding or renaming a worksheet."""
+        get_state_store().delete(f"sheet_metadata:{self.id}")
+
+
+class CachedClient(gspread.Client):
+    """gspread Client whose open_by_key() hands out one CachedSpreadsheet per key."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._spreadsheets: Dict[str, CachedSpreadsheet] = {}
+        self._open_lock = threading.Lock()
+
+    def open_by_key(self, key: str) -> CachedSpreadsheet:
+        with self._open_lock:
+            if key not in self._spreadsheets:
+                self._spreadsheets[key] = CachedSpreadsheet(self.http_client, {"id": key})
+            return self._spreadsheets[key]
+
+
+def get_client() -> CachedClient:
+    """The process-wide Sheets client; the first call authorizes it."""
+    global _client
+    with _lock:
+        if _client is None:
+            creds = ServiceAccountCredentials.from_json_keyfile_name(CREDS_FILE, SCOPES)
+            client = CachedClient(creds, http_client=GovernedHTTPClient)
+            _load_token(client.http_client.auth)
+            _client = client
+        return _client
@@ -0,0 +1,161 @@
+# sheets_quota.py
+"""One Google Sheets API quota governor for every stage and process.
+
+Reads and writes each take a token from a bucket kept in the state store,
+so the updater, distributor, sender and webhook server share the per-user
+quota even when they run at the same time. GovernedHTTPClient also
+retries 429/5xx answers with backoff (a 429 pauses the shared bucket for
+everybody), and identical GETs issued at once by several threads are sent
+only once. sheets_client.get_client() builds every client on it.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from gspread.exceptions import APIError
+from gspread.http_client import HTTPClient
+from config import (SHEETS_READS_PER_MINUTE, SHEETS_WRITES_PER_MINUTE, SHEETS_BURST,
+                    SHEETS_MAX_RETRIES, SHEETS_BACKOFF_BASE, SHEETS_BACKOFF_MAX)
+from rate_limit import backoff_delay, retry_after_seconds
+from state_store import get_state_store
+
+RETRY_CODES = {408, 429}
+
+
+class SharedTokenBucket:
+    """Token bucket like rate_limit.TokenBucket, but shared between processes.
+
+    The level lives in the state store and is updated inside BEGIN IMMEDIATE
+    transactions, so concurrent processes take turns. Like TokenBucket, a
+    caller reserves its token first and then sleeps until it is due.
+    """
+
+    def __init__(self, name: str, rate: float, capacity: float):
+        self.name = name
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._store = get_state_store()
+        self._store.execute(
+            "CREATE TABLE IF NOT EXISTS quota_buckets ("
+            " name TEXT PRIMARY KEY, tokens REAL NOT NULL, stamp REAL NOT NULL)"
+        )
+
+    def _load(self, now: float) -> Tuple[float, float]:
+        rows = self._store.execute("SELECT tokens, stamp FROM quota_buckets WHERE name = ?", (self.name,))
+        tokens, stamp = rows[0] if rows else (self.capacity, now)
+        if now > stamp:
+            tokens = min(self.capacity, tokens + (now - stamp) * self.rate)
+            stamp = now
+        return tokens, stamp
+
+    def _save(self, tokens: float, stamp: float) -> None:
+        self._store.execute("INSERT OR REPLACE INTO quota_buckets (name, tokens, stamp) VALUES (?, ?, ?)",
+                            (self.name, tokens, stamp))
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        with self._store.transaction():
+            now = time.time()
+            level, stamp = self._load(now)
+            level -= tokens
+            wait = max(0.0, stamp - now) + max(0.0, -level) / self.rate
+            self._save(level, stamp)
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for the next `seconds`, in every process."""
+        with self._store.transaction():
+            now = time.time()
+            level, stamp = self._load(now)
+            self._save(min(level, 0.0), max(stamp, now + seconds))
+
+
+_buckets: Dict[str, SharedTokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def _bucket_for(method: str) -> SharedTokenBucket:
+    kind = "read" if method.upper() == "GET" else "write"
+    with _buckets_lock:
+        if kind not in _buckets:
+            per_minute = SHEETS_READS_PER_MINUTE if kind == "read" else SHEETS_WRITES_PER_MINUTE
+            burst = min(SHEETS_BURST, per_minute - 1)
+            _buckets[kind] = SharedTokenBucket(f"sheets_{kind}", (per_minute - burst) / 60.0, burst)
+        return _buckets[kind]
+
+
+def _retryable(err: APIError) -> bool:
+    if err.code in RETRY_CODES or err.code >= 500:
+        return True
+    # Drive answers 403 (not 429) when a usage limit is hit
+    errors = err.error.get("errors") or []
+    return err.code == 403 and bool(errors) and errors[0].get("domain") == "usageLimits"
+
+
+# ==========================
+# Governed HTTP Client
+# ==========================
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error: Optional[BaseException] = None
+
+
+_inflight: Dict[Tuple[str, str], _Flight] = {}
+_inflight_lock = threading.Lock()
+
+
+def _freeze(params: Any) -> str:
+    return repr(sorted(params.items())) if isinstance(params, dict) else repr(params)
+
+
+class GovernedHTTPClient(HTTPClient):
+    """gspread HTTPClient whose every call goes through the shared quota."""
+
+    def request(self, method, endpoint, params=None, data=None, json=None, files=None, headers=None):
+        if method.upper() != "GET":
+            return self._governed(method, endpoint, params=params, data=data, json=json,
+                                  files=files, headers=headers)
+
+        # single flight: a GET already on the wire is shared, not repeated
+        key = (endpoint, _freeze(params))
+        with _inflight_lock:
+            flight = _inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _inflight[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.response
+
+        try:
+            flight.response = self._governed(method, endpoint, params=params, headers=headers)
+            return flight.response
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with _inflight_lock:
+                del _inflight[key]
+            flight.done.set()
+
+    def _governed(self, method, endpoint, **kwargs):
+        bucket = _bucket_for(method)
+        for attempt in range(SHEETS_MAX_RETRIES + 1):
+            bucket.acquire()
+            try:
+                return super().request(method, endpoint, **kwargs)
+            except APIError as e:
+                if attempt == SHEETS_MAX_RETRIES or not _retryable(e):
+                    raise
+                wait = (retry_after_seconds(e.response.headers.get("Retry-After"))
+                        or backoff_delay(attempt, SHEETS_BACKOFF_BASE, SHEETS_BACKOFF_MAX))
+                print(f"⏳ Sheets API {e.code}, retrying in {wait:.1f}s "
+                      f"({attempt + 1}/{SHEETS_MAX_RETRIES})")
+                if e.code == 429:
+                    bucket.pause(wait)  # the next acquire() waits it out, here and elsewhere
+                else:
+                    time.sleep(wait)
+
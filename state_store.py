@@ -0,0 +1,213 @@
+# state_store.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from config import STATE_DIR, STATE_DB
+
+
+class StateStore:
+    """Small key/value store over SQLite in WAL mode, shared by every stage.
+
+    Single writes commit on their own. Group writes with transaction() to
+    commit several keys atomically. Other modules may keep their own tables
+    in the same database through execute().
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._lock = threading.RLock()
+        self._depth = 0
+
+    @contextmanager
+    def transaction(self) -> Iterator["StateStore"]:
+        """Commit everything written inside the block together, or nothing."""
+        with self._lock:
+            if self._depth == 0:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._conn.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self._conn.execute("COMMIT")
+
+    def execute(self, sql: str, params=()) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def executemany(self, sql: str, rows) -> None:
+        with self.transaction():
+            self._conn.executemany(sql, rows)
+
+    # ----- raw values -----
+    def get(self, key: str) -> Optional[str]:
+        rows = self.execute("SELECT value FROM kv WHERE key = ?", (key,))
+        return rows[0][0] if rows else None
+
+    def set(self, key: str, value: str) -> None:
+        self.execute(
+            "INSERT INTO kv (key, value, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+            (key, value, time.time()),
+        )
+
+    def delete(self, key: str) -> None:
+        self.execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    # ----- typed values -----
+    def get_int(self, key: str, default: int = 0) -> int:
+        raw = self.get(key)
+        return int(raw) if raw is not None and raw.lstrip("-").isdigit() else default
+
+    def set_int(self, key: str, value: int) -> None:
+        self.set(key, str(int(value)))
+
+    def get_json(self, key: str, default: Any = None) -> Any:
+        raw = self.get(key)
+        if raw is None:
+            return default
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return default
+
+    def set_json(self, key: str, value: Any) -> None:
+        self.set(key, json.dumps(value))
+
+
+_store: Optional[StateStore] = None
+_store_lock = threading.Lock()
+
+
+def get_state_store() -> StateStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = StateStore(STATE_DB)
+            _create_pipeline_tables(_store)
+        return _store
+
+
+def _create_pipeline_tables(store: StateStore) -> None:
+    # orders fetched from a store but not yet confirmed on the master sheet
+    store.execute(
+        "CREATE TABLE IF NOT EXISTS staged_orders ("
+        " store TEXT NOT NULL, order_id INTEGER NOT NULL, platform TEXT NOT NULL,"
+        " payload TEXT NOT NULL, PRIMARY KEY (store, order_id))"
+    )
+    # orders normalize_order choked on, set aside so they don't block their store
+    store.execute(
+        "CREATE TABLE IF NOT EXISTS quarantined_orders ("
+        " store TEXT NOT NULL, order_id INTEGER NOT NULL, platform TEXT NOT NULL,"
+        " payload TEXT NOT NULL, error TEXT NOT NULL, quarantined_at REAL NOT NULL,"
+        " PRIMARY KEY (store, order_id))"
+    )
+
+
+# ==========================
+# Pipeline Checkpoints
+# ==========================
+def _sanitize(name: str) -> str:
+    return "".join(c for c in name if c.isalnum() or c in ("-", "_")).strip("_")
+
+
+def _checkpoint(key: str, legacy_file: str, default: int) -> int:
+    """Read an int checkpoint, importing it once from its old state/*.txt file."""
+    store = get_state_store()
+    if store.get(key) is not None:
+        return store.get_int(key, default)
+    value = default
+    path = os.path.join(STATE_DIR, legacy_file)
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            s = f.read().strip()
+            value = int(s) if s.isdigit() else default
+        store.set_int(key, value)
+    return value
+
+
+def load_last_order_id(store_name: str) -> int:
+    return _checkpoint(f"last_order_id:{store_name}",
+                       f"last_order_id_{_sanitize(store_name)}.txt", 0)
+
+
+def save_last_order_id(store_name: str, order_id: int) -> None:
+    get_state_store().set_int(f"last_order_id:{store_name}", order_id)
+
+
+# Store checkpoints are two-phase: fetched orders are staged first, and
+# last_order_id only moves (and the staged copies are dropped) once their
+# rows are on the master sheet.
+def stage_orders(store_name: str, platform: str, orders: List[Dict[str, Any]]) -> None:
+    get_state_store().executemany(
+        "INSERT OR REPLACE INTO staged_orders (store, order_id, platform, payload) VALUES (?, ?, ?, ?)",
+        [(store_name, o.get("id", 0), platform, json.dumps(o)) for o in orders],
+    )
+
+
+def load_staged_orders(store_name: str) -> List[Dict[str, Any]]:
+    rows = get_state_store().execute(
+        "SELECT payload FROM staged_orders WHERE store = ? ORDER BY order_id", (store_name,))
+    return [json.loads(payload) for (payload,) in rows]
+
+
+def max_staged_order_id(store_name: str) -> int:
+    rows = get_state_store().execute(
+        "SELECT MAX(order_id) FROM staged_orders WHERE store = ?", (store_name,))
+    return rows[0][0] or 0
+
+
+def commit_order_checkpoint(store_name: str, order_id: int) -> None:
+    """Advance last_order_id to `order_id` and drop the staged orders it covers."""
+    store = get_state_store()
+    with store.transaction():
+        if order_id > load_last_order_id(store_name):
+            save_last_order_id(store_name, order_id)
+        store.execute("DELETE FROM staged_orders WHERE store = ? AND order_id <= ?",
+                      (store_name, order_id))
+
+
+def quarantine_order(store_name: str, platform: str, order: Dict[str, Any], error: str) -> None:
+    """Move an order that cannot be normalized from staging to quarantined_orders."""
+    store = get_state_store()
+    with store.transaction():
+        store.execute(
+            "INSERT OR REPLACE INTO quarantined_orders"
+            " (store, order_id, platform, payload, error, quarantined_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (store_name, order.get("id", 0), platform, json.dumps(order), error, time.time()))
+        store.execute("DELETE FROM staged_orders WHERE store = ? AND order_id = ?",
+                      (store_name, order.get("id", 0)))
+
+
+def load_last_distributed_row() -> int:
+    return _checkpoint("last_distributed_row", "last_distributed_row.txt", 1)
+
+
+def save_last_distributed_row(n: int) -> None:
+    get_state_store().set_int("last_distributed_row", n)
+
+
+def load_last_sent_row(agent_name: str) -> int:
+    return _checkpoint(f"last_sent_row:{agent_name}",
+                       f"last_sent_row_{_sanitize(agent_name)}.txt", 1)
+
+
+def save_last_sent_row(agent_name: str, row: int) -> None:
+    get_state_store().set_int(f"last_sent_row:{agent_name}", row)
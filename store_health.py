@@ -0,0 +1,97 @@
+# store_health.py
+import time
+from typing import Any, Dict, List
+from config import BREAKER_FAILURE_THRESHOLD, BREAKER_COOLDOWN_SECONDS, HEALTH_HISTORY_SIZE
+from state_store import get_state_store
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+# ==========================
+# Persistence
+# ==========================
+def load_health(store_name: str) -> Dict[str, Any]:
+    health = {"state": CLOSED, "failures": 0, "opened_at": 0.0, "history": []}
+    health.update(get_state_store().get_json(f"store_health:{store_name}", {}))
+    return health
+
+
+def _save_health(store_name: str, health: Dict[str, Any]) -> None:
+    get_state_store().set_json(f"store_health:{store_name}", health)
+
+
+# ==========================
+# Circuit Breaker
+# ==========================
+def allow_request(store_name: str) -> str:
+    """Decide whether to call a store this run.
+
+    Returns CLOSED (call normally), HALF_OPEN (call once as a probe) or
+    OPEN (skip it). An open breaker turns half-open once
+    BREAKER_COOLDOWN_SECONDS have passed since it opened.
+    """
+    health = load_health(store_name)
+    if health["state"] == CLOSED:
+        return CLOSED
+    if time.time() - health["opened_at"] >= BREAKER_COOLDOWN_SECONDS:
+        health["state"] = HALF_OPEN
+        _save_health(store_name, health)
+        return HALF_OPEN
+    return OPEN
+
+
+def seconds_until_probe(store_name: str) -> int:
+    health = load_health(store_name)
+    return max(0, int(health["opened_at"] + BREAKER_COOLDOWN_SECONDS - time.time()))
+
+
+def _record(store_name: str, ok: bool, latency: float, error: str = "") -> Dict[str, Any]:
+    health = load_health(store_name)
+    health["history"].append({"at": round(time.time(), 1), "ok": ok,
+                              "latency": round(latency, 2), "error": error[:200]})
+    health["history"] = health["history"][-HEALTH_HISTORY_SIZE:]
+    return health
+
+
+def record_success(store_name: str, latency: float) -> None:
+    health = _record(store_name, True, latency)
+    health.update(state=CLOSED, failures=0, opened_at=0.0)
+    _save_health(store_name, health)
+
+
+def record_failure(store_name: str, latency: float, error: str) -> None:
+    health = _record(store_name, False, latency, error)
+    health["failures"] += 1
+    # a failed probe re-opens straight away; otherwise wait for the threshold
+    if health["state"] == HALF_OPEN or health["failures"] >= BREAKER_FAILURE_THRESHOLD:
+        if health["state"] != OPEN:
+            print(f"⛔ Circuit opened for {store_name} after {health['failures']} failures.")
+        health.update(state=OPEN, opened_at=time.time())
+    _save_health(store_name, health)
+
+
+# ==========================
+# Run Summary
+# ==========================
+def summary_lines(store_names: List[str]) -> List[str]:
+    lines = []
+    for name in store_names:
+        health = load_health(name)
+        history = health["history"]
+        if not history:
+            lines.append(f"   {name}: {health['state']}, no history yet")
+            continue
+        errors = sum(1 for h in history if not h["ok"])
+        avg = sum(h["latency"] for h in history) / len(history)
+        line = (f"   {name}: {health['state']}, last {history[-1]['latency']}s, "
+                f"avg {avg:.2f}s, errors {errors}/{len(history)}")
+        if not history[-1]["ok"]:
+            line += f" (last error: {history[-1]['error']})"
+        lines.append(line)
+    return lines
+
+
+def print_summary(store_names: List[str]) -> None:
+    print("📊 Store health:")
+    for line in summary_lines(store_names):
+        print(line)
@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# keep the pipeline's state (SQLite store, order journal) out of the repo's state/ dir
+_state = tempfile.mkdtemp(prefix="pipeline-test-state-")
+os.environ["STATE_DB"] = os.path.join(_state, "pipeline_state.sqlite3")
+os.environ["ORDER_JOURNAL_PATH"] = os.path.join(_state, "orders.journal")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,21 @@
+from config import HEADERS
+from canonical import canonical_phone, phone_as_text
+
+PHONE = HEADERS.index("PhoneNumber")
+
+
+def test_phones_become_e164():
+    for raw in ("0803 123 4567", "+234 803 123 4567", "2348031234567", "+234 0803-123-4567"):
+        assert canonical_phone(raw) == "+2348031234567"
+    assert canonical_phone("0803..., 0805...") == "0803..., 0805..."
+
+
+def test_phone_cell_is_written_as_text():
+    row = [""] * len(HEADERS)
+    row[PHONE] = "+2348031234567"
+    written = phone_as_text([row, [""] * len(HEADERS)])
+
+    assert written[0][PHONE] == "'+2348031234567"
+    assert written[1][PHONE] == ""
+    assert row[PHONE] == "+2348031234567"  # the caller's rows are left alone
+    assert phone_as_text(written)[0][PHONE] == "'+2348031234567"
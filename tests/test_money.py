@@ -0,0 +1,77 @@
+from decimal import Decimal
+
+import pytest
+
+from money import format_kobo, parse_kobo, parse_many
+
+
+@pytest.mark.parametrize("value, kobo", [
+    ("12500.00", 1250000),
+    ("12,500", 1250000),
+    ("1,234,567.89", 123456789),
+    ("₦12,500", 1250000),
+    ("₦ 2,950.5", 295050),
+    ("$1,234.5", 123450),
+    ("NGN 100", 10000),
+    (" 7.05 ", 705),
+    (".5", 50),
+    ("3.", 300),
+    ("1.2.3", 120),  # a second point ends the number
+])
+def test_text_amounts(value, kobo):
+    assert parse_kobo(value) == kobo
+
+
+@pytest.mark.parametrize("value, kobo", [
+    ("0.004", 0),
+    ("0.005", 1),
+    ("1.994", 199),
+    ("1.995", 200),
+    ("9.9951", 1000),  # only the third decimal decides
+    ("-1.005", -101),  # half up in size, away from zero
+])
+def test_rounds_half_up_at_the_third_decimal(value, kobo):
+    assert parse_kobo(value) == kobo
+
+
+@pytest.mark.parametrize("value, kobo", [
+    ("-500", -50000),
+    ("-₦1,000.50", -100050),
+    ("₦-1,000", -100000),
+    ("(250.00)", -25000),
+    ("(₦1,250)", -125000),
+    ("500-", 50000),  # a dash after the digits is not a sign
+])
+def test_negatives(value, kobo):
+    assert parse_kobo(value) == kobo
+
+
+@pytest.mark.parametrize("value", [None, "", "N/A", "-", "₦"])
+def test_missing_or_junk_is_zero(value):
+    assert parse_kobo(value) == 0
+
+
+def test_numbers():
+    assert parse_kobo(125) == 12500
+    assert parse_kobo(19.99) == 1999
+    assert parse_kobo(0.005) == 1
+    assert parse_kobo(Decimal("2.345")) == 235
+    assert parse_many(["1", 2, None, "₦3.50"]) == [100, 200, 0, 350]
+
+
+def test_scientific_notation():
+    assert parse_kobo("1e3") == 100000
+    assert parse_kobo("1.5E+2") == 15000
+    assert parse_kobo("-2.5e1") == -2500
+    assert parse_kobo("1e-2") == 1
+    assert parse_kobo("12,500 each") == 1250000  # an "e" that is not an exponent
+    assert parse_kobo("1e999999999") == 0
+
+
+@pytest.mark.parametrize("kobo, text", [
+    (0, "0.00"), (5, "0.05"), (295000, "2950.00"), (123456789, "1234567.89"),
+    (-50, "-0.50"), (-100050, "-1000.50"),
+])
+def test_format_kobo_round_trips(kobo, text):
+    assert format_kobo(kobo) == text
+    assert parse_kobo(text) == kobo
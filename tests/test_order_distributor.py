@@ -0,0 +1,53 @@
+import itertools
+
+from config import HEADERS
+import order_distributor
+
+_ids = itertools.count(1)
+
+
+class FakeSheet:
+    def __init__(self, header):
+        self.spreadsheet_id = "sheet"
+        self.id = next(_ids)  # read_header caches per worksheet
+        self.header = list(header)
+        self.appended = []
+        self.updates = []
+
+    def row_values(self, n):
+        return list(self.header)
+
+    def append_rows(self, rows, value_input_option=None):
+        self.appended.extend(rows)
+
+    def batch_update(self, data, value_input_option=None):
+        self.updates.extend(data)
+
+
+def _assign(master):
+    grace, joy = FakeSheet(HEADERS), FakeSheet(HEADERS)
+    rows = [[f"order {n}"] for n in range(1, 5)]
+    assignments = [(n, "Grace" if n % 2 else "Joy", r) for n, r in enumerate(rows, start=10)]
+    assignments.append((14, "Grace", ["order 5"]))
+    order_distributor._write_assignments(master, {"Grace": grace, "Joy": joy}, assignments)
+    return grace, joy
+
+
+def test_agent_column_defaults_to_headers_position():
+    master = FakeSheet(HEADERS[:-1])  # a master created before the column existed
+    grace, joy = _assign(master)
+
+    col = order_distributor.col_letter(HEADERS.index("agent in charge"))
+    assert master.updates == [{"range": f"{col}11:{col}15",
+                               "values": [["Joy"], ["Grace"], ["Joy"], ["Grace"], ["Grace"]]}]
+    assert [r[0] for r in grace.appended] == ["order 2", "order 4", "order 5"]
+    assert [r[0] for r in joy.appended] == ["order 1", "order 3"]
+    assert all(len(r) == len(HEADERS) for r in grace.appended + joy.appended)
+
+
+def test_agent_column_follows_master_header():
+    header = ["DATE", "ORDER NUMBER", " agent in charge "]
+    master = FakeSheet(header)
+    _assign(master)
+
+    assert [u["range"] for u in master.updates] == ["C11:C15"]
@@ -0,0 +1,35 @@
+from config import HEADERS
+from order_index import ORDER_COL, SOURCE_COL, OrderIndex
+import order_index
+from state_store import get_state_store
+
+
+class FakeSheet:
+    spreadsheet_id, id = "test-book", 0
+
+
+def _row(source, order_id):
+    row = [""] * len(HEADERS)
+    row[ORDER_COL], row[SOURCE_COL] = order_id, source
+    return row
+
+
+def test_rebuild_reads_the_sheet_before_locking_the_store(monkeypatch):
+    sheet = [_row("Shop", 1), _row("Shop", 2), _row("Other", 1)]
+    reads = []
+
+    def read_rows(ws, first_row, **kwargs):
+        reads.append(get_state_store()._conn.in_transaction)
+        return sheet[first_row - 2:]
+
+    monkeypatch.setattr(order_index, "read_rows", read_rows)
+    index = OrderIndex(FakeSheet())
+    index.add_keys(["Gone|9"])
+
+    assert index.rebuild() == 3
+    assert reads == [False]
+    assert len(index) == 3 and "Shop|2" in index and "Gone|9" not in index
+
+    sheet.append(_row("Shop", 3))
+    assert index.sync() == 1  # carries on after the rebuilt rows
+    assert "Shop|3" in index and len(index) == 4
@@ -0,0 +1,104 @@
+import time
+
+from config import HEADERS
+from order_index import ORDER_COL, SOURCE_COL
+import pipeline
+import state_store
+
+
+class FakeMaster:
+    def __init__(self):
+        self.rows = []
+
+    def append_rows(self, rows, value_input_option=None):
+        self.rows.extend(rows)
+
+
+class FakeIndex(set):
+    def add_keys(self, keys):
+        self.update(keys)
+
+
+def _run(monkeypatch, store, pages, normalize):
+    """Run the pipeline over `pages` of order ids for one store; returns the fake master."""
+    master = FakeMaster()
+
+    def iter_pages(names):
+        for ids in pages:
+            orders = [{"id": i} for i in ids]
+            state_store.stage_orders(store, "woo", orders)
+            yield [{"source_name": store, "platform": "woo", "order": o} for o in orders]
+
+    monkeypatch.setattr(pipeline, "STORES", [{"name": store, "type": "woo"}])
+    monkeypatch.setattr(pipeline, "PIPELINE_NORMALIZE_WORKERS", 2)
+    monkeypatch.setattr(pipeline, "iter_new_order_pages", iter_pages)
+    monkeypatch.setattr(pipeline, "normalize_or_quarantine", normalize)
+    monkeypatch.setattr(pipeline, "open_master", lambda: master)
+    monkeypatch.setattr(pipeline, "load_order_index", lambda ws: FakeIndex())
+    monkeypatch.setattr(pipeline, "distribute_new_rows", lambda: 0)
+    monkeypatch.setattr(pipeline, "PEOPLE", [])
+    pipeline.Pipeline().run()
+    return master
+
+
+def _row(entry):
+    row = [""] * len(HEADERS)
+    row[ORDER_COL], row[SOURCE_COL] = entry["order"]["id"], entry["source_name"]
+    return row
+
+
+def test_pages_are_appended_and_committed_in_fetch_order(monkeypatch):
+    def normalize(entry):
+        if entry["order"]["id"] < 200:
+            time.sleep(0.2)  # the first page finishes normalizing last
+        return [_row(entry)]
+
+    master = _run(monkeypatch, "InOrder", [[101, 102], [201, 202]], normalize)
+
+    assert [r[ORDER_COL] for r in master.rows] == [101, 102, 201, 202]
+    assert state_store.load_last_order_id("InOrder") == 202
+    assert state_store.load_staged_orders("InOrder") == []
+
+
+def test_normalize_failure_stops_committing_the_store(monkeypatch):
+    def normalize(entry):
+        if entry["order"]["id"] < 200:
+            raise ValueError("bad order")
+        return [_row(entry)]
+
+    master = _run(monkeypatch, "Broken", [[101, 102], [201, 202]], normalize)
+
+    assert master.rows == []
+    assert state_store.load_last_order_id("Broken") == 0
+    assert [o["id"] for o in state_store.load_staged_orders("Broken")] == [101, 102, 201, 202]
+
+
+def test_orders_before_a_failed_page_are_still_committed(monkeypatch):
+    def normalize(entry):
+        if 200 < entry["order"]["id"] < 300:
+            raise ValueError("bad order")
+        return [_row(entry)]
+
+    master = _run(monkeypatch, "Partial", [[101], [201], [301]], normalize)
+
+    assert [r[ORDER_COL] for r in master.rows] == [101]
+    assert state_store.load_last_order_id("Partial") == 101
+    assert [o["id"] for o in state_store.load_staged_orders("Partial")] == [201, 301]
+
+
+def test_a_slow_page_holds_back_the_fetch(monkeypatch):
+    monkeypatch.setattr(pipeline, "PIPELINE_QUEUE_SIZE", 1)
+    done, ahead = [], []
+
+    def normalize(entry):
+        if entry["order"]["id"] == 100:
+            time.sleep(0.3)
+            ahead.append(len(done))  # pages normalized while the first one was stuck
+        done.append(entry["order"]["id"])
+        return [_row(entry)]
+
+    master = _run(monkeypatch, "Slow", [[i] for i in range(100, 120)], normalize)
+
+    assert ahead[0] <= 2  # PIPELINE_QUEUE_SIZE + PIPELINE_NORMALIZE_WORKERS pages in flight
+    assert [r[ORDER_COL] for r in master.rows] == list(range(100, 120))
+    assert state_store.load_last_order_id("Slow") == 119
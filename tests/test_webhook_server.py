@@ -0,0 +1,92 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+import webhook_server
+from webhook_server import ORDER_TOPICS, SIGNATURE_HEADERS, TOPIC_HEADERS, _sign
+
+STORES = [{"name": "Woo Shop", "type": "woo", "webhook_secret": "woo-secret"},
+          {"name": "ShopifyShop", "type": "shopify", "webhook_secret": "shop-secret"}]
+
+
+class FakeWriter:
+    def __init__(self):
+        self.rows = []
+
+    def add(self, rows):
+        self.rows.extend(rows)
+        return len(rows)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Serve WebhookHandler on a free port; yields (base url, fake writer)."""
+    writer = FakeWriter()
+    monkeypatch.setattr(webhook_server, "STORES", STORES)
+    monkeypatch.setattr(webhook_server, "writer", writer)
+    monkeypatch.setattr(webhook_server, "normalize_or_quarantine",
+                        lambda entry: [[entry["source_name"], entry["order"]["id"]]])
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), webhook_server.WebhookHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/webhooks/", writer
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _post(url, body, headers):
+    try:
+        with urlopen(Request(url, data=body, method="POST", headers=headers), timeout=5) as resp:
+            return resp.status, resp.read().decode()
+    except HTTPError as e:
+        return e.code, e.read().decode()
+
+
+def _signed(stype, secret, body, topic=None):
+    return {TOPIC_HEADERS[stype]: topic or ORDER_TOPICS[stype],
+            SIGNATURE_HEADERS[stype]: _sign(secret, body)}
+
+
+def test_verify_checks_the_store_secret():
+    body = b'{"id": 1}'
+    store = STORES[0]
+    assert webhook_server._verify(store, _sign("woo-secret", body), body)
+    assert not webhook_server._verify(store, _sign("other-secret", body), body)
+    assert not webhook_server._verify(store, None, body)
+    assert not webhook_server._verify({"name": "NoSecret"}, _sign("", body), body)
+
+
+def test_valid_orders_are_queued_on_the_writer(server):
+    base, writer = server
+    woo = json.dumps({"id": 7}).encode()
+    shopify = json.dumps({"id": 8}).encode()
+
+    assert _post(base + "Woo%20Shop", woo, _signed("woo", "woo-secret", woo)) == (200, "ok")
+    assert _post(base + "ShopifyShop", shopify, _signed("shopify", "shop-secret", shopify)) == (200, "ok")
+    assert writer.rows == [["Woo Shop", 7], ["ShopifyShop", 8]]
+
+
+def test_bad_or_missing_signature_is_rejected(server):
+    base, writer = server
+    body = json.dumps({"id": 7}).encode()
+
+    assert _post(base + "Woo%20Shop", body, _signed("woo", "wrong-secret", body))[0] == 401
+    assert _post(base + "Woo%20Shop", body, {TOPIC_HEADERS["woo"]: ORDER_TOPICS["woo"]})[0] == 401
+    tampered = _signed("shopify", "shop-secret", body)
+    assert _post(base + "ShopifyShop", body + b" ", tampered)[0] == 401
+    assert writer.rows == []
+
+
+def test_woo_ping_and_other_topics_are_acknowledged_but_not_queued(server):
+    base, writer = server
+    ping = b"webhook_id=12"
+    other = json.dumps({"id": 7}).encode()
+
+    assert _post(base + "Woo%20Shop", ping, {}) == (200, "pong")
+    assert _post(base + "ShopifyShop", other,
+                 _signed("shopify", "shop-secret", other, topic="orders/updated")) == (200, "ignored")
+    assert _post(base + "NoSuchStore", other, {})[0] == 404
+    assert writer.rows == []
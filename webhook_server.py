@@ -0,0 +1,152 @@
+# webhook_server.py
+"""Receive Shopify orders/create and WooCommerce order.created webhooks.
+
+Each store posts to /webhooks/<store name>. Payloads are HMAC-checked
+against the store's webhook_secret, normalized straight away and queued on
+a MasterBatchWriter, so new orders reach the master sheet within seconds.
+multi_master_updater.py keeps running on its schedule as the reconciliation
+sweep; duplicates are skipped by order id.
+
+    python webhook_server.py                  # serve on WEBHOOK_HOST:WEBHOOK_PORT
+    python webhook_server.py stub <store>     # post a signed sample order to it
+"""
+import base64
+import hashlib
+import hmac
+import json
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import unquote
+from urllib.request import Request, urlopen
+from config import (STORES, WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_FLUSH_ROWS,
+                    WEBHOOK_FLUSH_SECONDS)
+from multi_master_updater import normalize_or_quarantine, open_master_writer
+import order_journal
+
+ORDER_TOPICS = {"shopify": "orders/create", "woo": "order.created"}
+SIGNATURE_HEADERS = {"shopify": "X-Shopify-Hmac-Sha256", "woo": "X-WC-Webhook-Signature"}
+TOPIC_HEADERS = {"shopify": "X-Shopify-Topic", "woo": "X-WC-Webhook-Topic"}
+
+writer = None  # MasterBatchWriter, opened in serve()
+
+
+# ==========================
+# Helpers
+# ==========================
+def _store_for_path(path: str) -> Optional[Dict[str, Any]]:
+    prefix = "/webhooks/"
+    if not path.startswith(prefix):
+        return None
+    name = unquote(path[len(prefix):].split("?", 1)[0]).strip("/")
+    return next((s for s in STORES if s.get("name") == name), None)
+
+
+def _sign(secret: str, body: bytes) -> str:
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).digest()
+    return base64.b64encode(digest).decode()
+
+
+def _verify(store: Dict[str, Any], signature: Optional[str], body: bytes) -> bool:
+    secret = store.get("webhook_secret")
+    if not secret or not signature:
+        return False
+    return hmac.compare_digest(_sign(secret, body), signature.strip())
+
+
+# ==========================
+# Request Handler
+# ==========================
+class WebhookHandler(BaseHTTPRequestHandler):
+    def _reply(self, code: int, text: str = "") -> None:
+        body = text.encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        store = _store_for_path(self.path)
+        if store is None:
+            return self._reply(404, "unknown store")
+
+        name = store.get("name")
+        stype = store.get("type", "woo").lower()
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        topic = self.headers.get(TOPIC_HEADERS.get(stype, ""))
+        if topic is None and stype == "woo" and body.startswith(b"webhook_id="):
+            return self._reply(200, "pong")  # WooCommerce pings a new webhook unsigned
+
+        if not _verify(store, self.headers.get(SIGNATURE_HEADERS.get(stype, "")), body):
+            print(f"🚫 Rejected webhook for {name}: bad signature")
+            return self._reply(401, "bad signature")
+        if topic != ORDER_TOPICS.get(stype):
+            return self._reply(200, "ignored")  # acknowledge so the store doesn't retry
+
+        try:
+            order = json.loads(body)
+        except ValueError:
+            return self._reply(400, "bad json")
+
+        order_journal.append_orders(name, stype, [order])
+        rows = normalize_or_quarantine({"source_name": name, "platform": stype, "order": order})
+        queued = writer.add(rows)
+        print(f"📥 {name}: webhook order {order.get('id')} → {queued}/{len(rows)} rows queued")
+        return self._reply(200, "ok")
+
+    def log_message(self, format, *args):
+        pass  # do_POST prints its own one-line summary
+
+
+# ==========================
+# Server + Local Stub
+# ==========================
+def serve(host: str = WEBHOOK_HOST, port: int = WEBHOOK_PORT) -> None:
+    global writer
+    writer = open_master_writer(WEBHOOK_FLUSH_ROWS, WEBHOOK_FLUSH_SECONDS)
+    server = ThreadingHTTPServer((host, port), WebhookHandler)
+    print(f"🛰️ Listening for store webhooks on http://{host}:{port}/webhooks/<store>")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        writer.close()
+        print("✅ Webhook server stopped.")
+
+
+def send_stub_order(store_name: str, host: str = WEBHOOK_HOST, port: int = WEBHOOK_PORT) -> int:
+    """Post a signed sample order for `store_name`, the way the store would."""
+    store = next((s for s in STORES if s.get("name") == store_name), None)
+    if store is None:
+        raise SystemExit(f"❌ No store named {store_name!r} in config.STORES")
+    stype = store.get("type", "woo").lower()
+
+    if stype == "shopify":
+        order = {"id": 1, "name": "#STUB1", "created_at": "2024-01-01T00:00:00",
+                 "customer": {"first_name": "Stub", "last_name": "Customer", "phone": "08000000000"},
+                 "line_items": [{"title": "Stub product", "quantity": 1, "price": "1000.00", "sku": "STUB"}]}
+    else:
+        order = {"id": 1, "date_created": "2024-01-01T00:00:00", "status": "processing",
+                 "billing": {"first_name": "Stub", "last_name": "Customer", "phone": "08000000000",
+                             "address_1": "1 Stub Street", "city": "Ikeja", "state": "LA"},
+                 "line_items": [{"name": "Stub product", "quantity": 1, "total": "1000.00", "sku": "STUB"}]}
+
+    body = json.dumps(order).encode()
+    req = Request(f"http://{host}:{port}/webhooks/{store_name}", data=body, method="POST",
+                  headers={"Content-Type": "application/json",
+                           TOPIC_HEADERS[stype]: ORDER_TOPICS[stype],
+                           SIGNATURE_HEADERS[stype]: _sign(store.get("webhook_secret") or "", body)})
+    with urlopen(req, timeout=10) as resp:
+        print(f"📤 Stub order for {store_name}: HTTP {resp.status}")
+        return resp.status
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "stub":
+        send_stub_order(sys.argv[2])
+    else:
+        serve()
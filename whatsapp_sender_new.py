@@ -1,40 +1,28 @@
 # whatsapp_sender.py
-import os
 import time
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from typing import List
-from config import CREDS_FILE, STATE_DIR, WHATSAPP_DELAY_SECONDS, TWILIO_SID, TWILIO_AUTH, TWILIO_FROM
+from config import WHATSAPP_DELAY_SECONDS, TWILIO_SID, TWILIO_AUTH, TWILIO_FROM
 from personal_sheets import PEOPLE
 from twilio.rest import Client
+from sheet_reader import columns_for, read_header, read_rows
+from sheets_client import get_client
+import state_store
+
+# Sheet columns _row_to_message reads; only these are fetched
+MESSAGE_FIELDS = ["ORDER NUMBER", "FIRST NAME", "LAST NAME", "PHONE NUMBER",
+                  "ADDRESS", "LOCATION", "PRODUCT", "QUANTITY", "PRICE"]
 
 # Twilio client
 twilio_client = Client(TWILIO_SID, TWILIO_AUTH)
 
 def _gs_client():
-    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(CREDS_FILE, scope)
-    return gspread.authorize(creds)
-
-def _sanitize(name: str) -> str:
-    return "".join(c for c in name if c.isalnum() or c in ("-", "_")).strip("_")
-
-def _person_tracker_file(name: str) -> str:
-    os.makedirs(STATE_DIR, exist_ok=True)
-    return os.path.join(STATE_DIR, f"last_sent_row_{_sanitize(name)}.txt")
+    return get_client()
 
 def _load_last_sent_row(name: str) -> int:
-    path = _person_tracker_file(name)
-    if not os.path.exists(path):
-        return 1
-    with open(path, "r") as f:
-        s = f.read().strip()
-        return int(s) if s.isdigit() else 1
+    return state_store.load_last_sent_row(name)
 
 def _save_last_sent_row(name: str, row: int) -> None:
-    path = _person_tracker_file(name)
-    with open(path, "w") as f:
-        f.write(str(row))
+    state_store.save_last_sent_row(name, row)
 
 def _row_to_message(row: List[str], header: List[str]) -> str:
     # Map actual sheet header → row values
@@ -73,40 +61,44 @@ def _send_whatsapp(phone: str, message: str):
         print(f"❌ Twilio send failed: {e}")
         return None
 
+def send_new_rows_for_person(person) -> int:
+    """WhatsApp one agent the rows added to their sheet since the last send."""
+    name = person["name"]
+    phone = person["whatsapp"]
+    ws = _gs_client().open_by_key(person["sheet_id"]).worksheet("December")
+
+    header = read_header(ws)
+    if not header:
+        return 0
+
+    # last_sent_abs counts the header, so the next unsent row is sheet row last_sent_abs + 1
+    last_sent_abs = _load_last_sent_row(name)
+    new_rows = read_rows(ws, max(2, last_sent_abs + 1),
+                         columns=columns_for(header, MESSAGE_FIELDS) or None, width=len(header))
+
+    if not new_rows:
+        print(f"✅ No new rows to WhatsApp for {name}.")
+        return 0
+
+    sent = 0
+    for row in new_rows:
+        msg = _row_to_message(row, header)
+        print(f"📲 Sending WhatsApp to {name} ({phone}) ...")
+        sid = _send_whatsapp(phone, msg)
+        if sid:
+            print(f"✅ Sent to {name}, SID={sid}")
+            sent += 1
+            time.sleep(WHATSAPP_DELAY_SECONDS)
+
+    new_abs = max(1, last_sent_abs) + len(new_rows)
+    _save_last_sent_row(name, new_abs)
+    print(f"✅ Updated last_sent_row for {name} -> {new_abs}")
+    return sent
+
 def send_new_personal_rows_via_whatsapp():
-    client = _gs_client()
     total_msgs = 0
-
     for person in PEOPLE:
-        name = person["name"]
-        phone = person["whatsapp"]
-        ws = client.open_by_key(person["sheet_id"]).worksheet("December")
-
-        all_vals = ws.get_all_values()
-        if not all_vals:
-            continue
-
-        header, data = all_vals[0], all_vals[1:]
-        last_sent_abs = _load_last_sent_row(name)
-        start_idx = max(0, last_sent_abs - 1)
-        new_rows = data[start_idx:]
-
-        if not new_rows:
-            print(f"✅ No new rows to WhatsApp for {name}.")
-            continue
-
-        for row in new_rows:
-            msg = _row_to_message(row, header)
-            print(f"📲 Sending WhatsApp to {name} ({phone}) ...")
-            sid = _send_whatsapp(phone, msg)
-            if sid:
-                print(f"✅ Sent to {name}, SID={sid}")
-                total_msgs += 1
-                time.sleep(WHATSAPP_DELAY_SECONDS)
-
-        new_abs = 1 + len(data)
-        _save_last_sent_row(name, new_abs)
-        print(f"✅ Updated last_sent_row for {name} -> {new_abs}")
+        total_msgs += send_new_rows_for_person(person)
 
     print(f"📦 Total WhatsApp messages sent: {total_msgs}")
     return total_msgs